@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def temp_media_root(settings, tmp_path):
+    """Картинки, которые создают фабрики тестов, пишутся во временный
+    каталог, а не в MEDIA_ROOT проекта.
+    """
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
@@ -0,0 +1,32 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipients',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'created',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('recipients',)
+    exclude = ('message',)
+    readonly_fields = ('last_error',)
+    actions = ('requeue',)
+
+    def requeue(self, request, queryset):
+        queryset.exclude(status=OutboxMessage.SENT).update(
+            status=OutboxMessage.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+    requeue.short_description = 'Отправить заново'
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,58 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Множество без ложных отказов, но с ложными срабатываниями.
+
+    Если значения нет в фильтре, его точно не добавляли; если есть —
+    скорее всего добавляли. По числу элементов и доле ложных
+    срабатываний подбираются размер и число хешей: при 1 % это около
+    9.6 бита и 7 хешей на элемент. Позиции получаются двойным
+    хешированием из одного blake2b.
+    """
+
+    def __init__(self, size, hashes, bits=None):
+        if size < 8 or not 1 <= hashes <= 255:
+            raise ValueError('Неверные параметры фильтра.')
+        self.size = size // 8 * 8
+        self.hashes = hashes
+        if bits is None:
+            bits = bytearray(self.size // 8)
+        elif len(bits) != self.size // 8:
+            raise ValueError('Размер битов не совпадает с size.')
+        self.bits = bytearray(bits)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        size = max(8, (size + 7) // 8 * 8)
+        hashes = max(1, min(255, round(size / capacity * math.log(2))))
+        return cls(size, hashes)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls((len(data) - 1) * 8, data[0], data[1:])
+
+    def to_bytes(self):
+        return bytes((self.hashes,)) + bytes(self.bits)
+
+    def positions(self, value):
+        if not isinstance(value, bytes):
+            value = str(value).encode()
+        digest = hashlib.blake2b(value, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        step = int.from_bytes(digest[8:], 'big') | 1
+        for index in range(self.hashes):
+            yield (first + index * step) % self.size
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(value)
+        )
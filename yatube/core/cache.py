@@ -0,0 +1,203 @@
+import hashlib
+import math
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_response_headers, set_response_etag
+
+SAFE_METHODS = ('GET', 'HEAD')
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache():
+    """Видят ли все процессы один и тот же кэш ``default``."""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def shared_timeout(timeout):
+    """Срок записи, которую сбрасывают сигналы.
+
+    В кэше процесса сброс не доходит до других воркеров, поэтому там
+    запись живет не дольше ``LOCAL_CACHE_TIMEOUT`` секунд.
+    """
+    if is_shared_cache():
+        return timeout
+    return min(timeout, settings.LOCAL_CACHE_TIMEOUT)
+
+
+@contextmanager
+def cache_lock(key, timeout=None):
+    """Неблокирующая блокировка на ``cache.add``.
+
+    ``add`` атомарен и в LocMemCache, и в общих бэкендах, поэтому
+    блокировку получает ровно один процесс. Отдает ``True``, если
+    блокировка захвачена.
+    """
+    lock_key = f'lock:{key}'
+    acquired = cache.add(
+        lock_key, 1, timeout or settings.CACHE_LOCK_TIMEOUT
+    )
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+
+def should_refresh(expires, delta, beta, now):
+    """Вероятностное досрочное обновление (XFetch).
+
+    Чем дольше пересборка ``delta`` и чем ближе срок ``expires``, тем
+    выше шанс, что запрос обновит запись заранее. При ``beta=0``
+    запись обновляется только после истечения срока.
+    """
+    if beta:
+        now -= delta * beta * math.log(1.0 - random.random())
+    return now >= expires
+
+
+def get_or_rebuild(key, build, timeout, grace=None, beta=None):
+    """Возвращает значение из кэша, пересобирая его не более чем
+    в одном процессе одновременно.
+
+    Запись хранится ``timeout + grace`` секунд. После ``timeout``
+    пересборку выполняет тот, кто захватил блокировку, а остальные
+    в течение ``grace`` получают устаревшую копию. При холодном промахе
+    остальные ждут пересборку до ``CACHE_LOCK_WAIT`` секунд. Если
+    ``build`` вернул ``None``, результат не кэшируется.
+    """
+    if grace is None:
+        grace = settings.CACHE_STALE_GRACE
+    if beta is None:
+        beta = settings.CACHE_EARLY_REFRESH_BETA
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        if not should_refresh(expires, delta, beta, time.time()):
+            return value
+        with cache_lock(key) as acquired:
+            if not acquired:
+                return value
+            return store(key, build, timeout, grace)
+    with cache_lock(key) as acquired:
+        if acquired:
+            return store(key, build, timeout, grace)
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(settings.CACHE_LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return build()
+
+
+def store(key, build, timeout, grace):
+    started = time.time()
+    value = build()
+    if value is not None:
+        now = time.time()
+        cache.set(
+            key, (value, now + timeout, now - started), timeout + grace
+        )
+    return value
+
+
+def response_to_entry(response):
+    return (
+        response.status_code,
+        response.content,
+        list(response.items()),
+    )
+
+
+def entry_to_response(status, content, headers):
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def is_cacheable(response):
+    cache_control = response.get('Cache-Control', '')
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in cache_control
+        and 'no-store' not in cache_control
+    )
+
+
+def cached_response(request, key, get_response, timeout, grace=None,
+                    beta=None, patch_headers=False):
+    """Отдает страницу из кэша с защитой от одновременных промахов.
+
+    Если ответ собран в этом запросе, возвращается он сам (со всеми
+    атрибутами, например контекстом шаблона), иначе — копия из кэша.
+    ``request.page_cache_hit`` отмечает попадание для метрик,
+    ``patch_headers`` добавляет заголовки Expires и Cache-Control,
+    как ``cache_page``. Сохраненная страница получает ETag, по которому
+    CompressionMiddleware находит ее уже сжатую копию. Потоковый
+    рендеринг для такого запроса выключается через
+    ``request.full_body_required``.
+    """
+    request.full_body_required = True
+    built = []
+
+    def build():
+        response = get_response()
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        built.append(response)
+        if not is_cacheable(response):
+            return None
+        if patch_headers:
+            patch_response_headers(response, timeout)
+        if not response.has_header('ETag'):
+            set_response_etag(response)
+        return response_to_entry(response)
+
+    entry = get_or_rebuild(key, build, timeout, grace, beta)
+    request.page_cache_hit = not built
+    if built:
+        return built[0]
+    return entry_to_response(*entry)
+
+
+def cache_page_swr(timeout, key_prefix='', grace=None, beta=None,
+                   vary_on_user=True):
+    """Аналог ``cache_page`` с stale-while-revalidate.
+
+    Ключ строится по полному адресу запроса и, если ``vary_on_user``,
+    по пользователю.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return view_func(request, *args, **kwargs)
+            key = 'swr_page:{}:{}'.format(
+                key_prefix,
+                hashlib.md5(request.get_full_path().encode()).hexdigest()
+            )
+            if vary_on_user:
+                key = f'{key}:{request.user.pk or 0}'
+            return cached_response(
+                request,
+                key,
+                lambda: view_func(request, *args, **kwargs),
+                timeout,
+                grace,
+                beta,
+                patch_headers=True,
+            )
+        return wrapper
+    return decorator
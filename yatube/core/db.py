@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def pragma_statements(pragmas):
+    # busy_timeout идет первым, чтобы переключение в WAL ждало
+    # освобождения базы, а не падало с "database is locked".
+    ordered = sorted(
+        pragmas.items(), key=lambda item: item[0] != 'busy_timeout'
+    )
+    return [f'PRAGMA {name} = {value}' for name, value in ordered]
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое подключение к SQLite.
+
+    Прагмы берутся из ключа ``PRAGMAS`` базы в ``DATABASES``,
+    а если его нет — из ``SQLITE_PRAGMAS``.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get(
+        'PRAGMAS', settings.SQLITE_PRAGMAS
+    )
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
+
+
+def check_connections(**kwargs):
+    """Проверяет постоянные подключения перед запросом.
+
+    Вызывается на ``request_started`` после штатного
+    ``close_old_connections``: подключение, не прошедшее проверку,
+    закрывается, и Django откроет новое при первом запросе к базе.
+    Проверка выполняется не чаще, чем раз в ``DB_HEALTH_CHECK_INTERVAL``.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        checked = getattr(connection, 'health_checked', 0)
+        if now - checked < settings.DB_HEALTH_CHECK_INTERVAL:
+            continue
+        connection.health_checked = now
+        if not is_usable(connection):
+            connection.close()
+
+
+def is_usable(connection):
+    if connection.vendor != 'sqlite':
+        return connection.is_usable()
+    try:
+        connection.connection.execute('SELECT 1')
+    except connection.Database.Error:
+        return False
+    return True
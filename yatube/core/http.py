@@ -0,0 +1,62 @@
+from functools import wraps
+
+from django.http import JsonResponse
+
+
+def accepted_encodings(request):
+    """Множество кодировок из заголовка Accept-Encoding."""
+    return {
+        token.split(';')[0].strip()
+        for token in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+
+
+def parse_range(header, size):
+    """Разбирает заголовок Range с одним диапазоном байт.
+
+    Возвращает ``(start, end)`` включительно или ``None``, если заголовок
+    нужно проигнорировать и отдать файл целиком. Для диапазона за
+    пределами файла выбрасывает ValueError.
+    """
+    units, _, ranges = header.partition('=')
+    if units.strip() != 'bytes' or ',' in ranges:
+        return None
+    start, _, end = ranges.strip().partition('-')
+    try:
+        if not start:
+            length = int(end)
+            if length <= 0:
+                raise ValueError('Пустой суффиксный диапазон.')
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise ValueError('Диапазон за пределами файла.')
+    return start, min(end, size - 1)
+
+
+def iter_file_range(path, start, length, block_size=64 * 1024):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(block_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def login_required_json(view_func):
+    """Как ``login_required``, но для AJAX: вместо редиректа на страницу
+    входа отвечает 401 в JSON.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'error': 'Требуется авторизация.'}, status=401
+            )
+        return view_func(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,63 @@
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """Оценка числа уникальных значений в фиксированной памяти.
+
+    ``2 ** precision`` однобайтовых регистров; при precision=12 это
+    4 КиБ и стандартная ошибка около 1.04 / sqrt(4096) ≈ 1.6 %.
+    Скетчи с одинаковой точностью объединяются поэлементным максимумом,
+    поэтому, например, дневные скетчи складываются в скетч за месяц.
+    """
+
+    def __init__(self, precision=12, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError('precision должна быть от 4 до 16.')
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            registers = bytearray(self.size)
+        elif len(registers) != self.size:
+            raise ValueError('Размер регистров не совпадает с precision.')
+        self.registers = bytearray(registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(int(math.log2(len(data))), data)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        if isinstance(value, str):
+            value = value.encode()
+        hashed = int.from_bytes(
+            hashlib.blake2b(value, digest_size=8).digest(), 'big'
+        )
+        index = hashed >> (64 - self.precision)
+        rest_bits = 64 - self.precision
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Нельзя объединить скетчи разной точности.')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        size = self.size
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(
+            size, 0.7213 / (1 + 1.079 / size)
+        )
+        estimate = alpha * size * size / sum(
+            2.0 ** -register for register in self.registers
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Малые мощности точнее считает линейный подсчет.
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
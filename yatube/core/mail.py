@@ -0,0 +1,49 @@
+import email
+from email.message import Message
+
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import MIMEMixin
+
+from .models import OutboxMessage
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Сохраняет письма в таблицу исходящих и сразу возвращает управление.
+
+    Письма доставляет команда ``send_outbox`` через бэкенд
+    ``OUTBOX_DELIVERY_BACKEND``.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [
+            OutboxMessage(
+                from_email=message.from_email,
+                recipients='\n'.join(message.recipients()),
+                message=message.message().as_bytes(),
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxMessage.objects.bulk_create(rows)
+        return len(rows)
+
+
+class StoredMIMEMessage(MIMEMixin, Message):
+    pass
+
+
+class StoredEmailMessage(EmailMessage):
+    """Письмо из таблицы исходящих: MIME отдается таким, каким сохранен."""
+
+    def __init__(self, outbox_message):
+        super().__init__(
+            from_email=outbox_message.from_email,
+            to=outbox_message.recipient_list(),
+        )
+        self.raw_message = bytes(outbox_message.message)
+
+    def message(self):
+        return email.message_from_bytes(
+            self.raw_message, _class=StoredMIMEMessage
+        )
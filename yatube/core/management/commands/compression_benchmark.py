@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.middleware.compression import compress
+from core.storage import brotli
+
+
+class Command(BaseCommand):
+    help = ('Показывает, сколько байт экономит сжатие страниц и сколько '
+            'процессорного времени оно стоит на один запрос.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*', default=['/'],
+            help='Адреса страниц, по умолчанию главная.'
+        )
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        client = Client()
+        encodings = ['gzip'] + (['br'] if brotli is not None else [])
+        for url in options['urls']:
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: статус {response.status_code}')
+            content = response.content
+            self.stdout.write(f'{url}: {len(content)} байт')
+            for encoding in encodings:
+                started = time.process_time()
+                for _ in range(options['repeat']):
+                    compressed = compress(content, encoding)
+                cpu_ms = (
+                    (time.process_time() - started) / options['repeat']
+                    * 1000
+                )
+                saved = len(content) - len(compressed)
+                self.stdout.write(
+                    f'  {encoding:>4}: {len(compressed)} байт, '
+                    f'экономия {saved} байт '
+                    f'({saved / len(content):.0%}), '
+                    f'CPU {cpu_ms:.3f} мс на запрос'
+                )
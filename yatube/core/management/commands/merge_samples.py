@@ -0,0 +1,35 @@
+import glob
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sampling import merge_folded, write_folded
+
+
+class Command(BaseCommand):
+    help = ('Объединяет folded-файлы сэмплирующего профайлера в один файл '
+            'для flamegraph.pl или speedscope.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Файлы для объединения; по умолчанию все файлы '
+                 'из SAMPLING_PROFILER_DIR.'
+        )
+        parser.add_argument(
+            '-o', '--output', required=True,
+            help='Путь к итоговому folded-файлу.'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or sorted(glob.glob(
+            os.path.join(settings.SAMPLING_PROFILER_DIR, '*.folded')
+        ))
+        merged = merge_folded(paths)
+        write_folded(options['output'], merged)
+        self.stdout.write(
+            f'Объединено файлов: {len(paths)}, '
+            f'сэмплов: {sum(merged.values())}, '
+            f'уникальных стеков: {len(merged)}.'
+        )
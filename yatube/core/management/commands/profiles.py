@@ -0,0 +1,68 @@
+import glob
+import io
+import json
+import os
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.middleware.profiling import make_profiling_token
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = ('Показывает сохраненные профили запросов и самые горячие '
+            'функции по всем профилям.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Количество функций в сводке.'
+        )
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='cumulative',
+            help='Ключ сортировки функций.'
+        )
+        parser.add_argument(
+            '--view', help='Учитывать только профили указанного view.'
+        )
+        parser.add_argument(
+            '--token', action='store_true',
+            help='Вывести токен для включения профилирования и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(make_profiling_token())
+            return
+        captures = self.load_captures(options['view'])
+        if not captures:
+            self.stdout.write('Профили не найдены.')
+            return
+        for meta in captures:
+            self.stdout.write(
+                '{created} {method} {path} [{view_name}] '
+                '{duration:.3f}s'.format(**meta)
+            )
+        output = io.StringIO()
+        stats = pstats.Stats(*(meta['file'] for meta in captures),
+                             stream=output)
+        stats.sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(output.getvalue())
+
+    def load_captures(self, view_name):
+        captures = []
+        pattern = os.path.join(settings.PROFILING_DIR, '*.json')
+        for meta_path in sorted(glob.glob(pattern)):
+            prof_path = meta_path[:-len('.json')] + '.prof'
+            if not os.path.exists(prof_path):
+                continue
+            with open(meta_path, encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            if view_name and meta['view_name'] != view_name:
+                continue
+            meta['file'] = prof_path
+            captures.append(meta)
+        return captures
@@ -0,0 +1,119 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.mail import StoredEmailMessage
+from core.models import OutboxMessage
+
+
+class Command(BaseCommand):
+    help = ('Доставляет письма из таблицы исходящих пачками через одно '
+            'подключение бэкенда OUTBOX_DELIVERY_BACKEND. Неудачные '
+            'попытки повторяются с нарастающей задержкой, после '
+            'OUTBOX_MAX_ATTEMPTS письмо помечается недоставленным.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новые письма.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками очереди в режиме --loop.'
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND)
+        sent = failed = 0
+        while True:
+            batch = self.claim(options['batch_size'])
+            if batch:
+                batch_sent, batch_failed = self.deliver(connection, batch)
+                sent += batch_sent
+                failed += batch_failed
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Отправлено: {sent}, с ошибкой: {failed}')
+
+    def claim(self, batch_size):
+        """Забирает пачку писем, готовых к отправке.
+
+        Письма переводятся в ``sending`` с арендой до ``lease_until``;
+        если отправитель упадет, после аренды их подхватит другой.
+        Условное обновление гарантирует, что одно письмо заберет
+        только один отправитель.
+        """
+        now = timezone.now()
+        ready = Q(status=OutboxMessage.PENDING) | Q(
+            status=OutboxMessage.SENDING
+        )
+        ids = list(
+            OutboxMessage.objects.filter(ready, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE)
+        OutboxMessage.objects.filter(
+            ready, pk__in=ids, next_attempt_at__lte=now
+        ).update(status=OutboxMessage.SENDING, next_attempt_at=lease_until)
+        return list(OutboxMessage.objects.filter(
+            pk__in=ids,
+            status=OutboxMessage.SENDING,
+            next_attempt_at=lease_until,
+        ))
+
+    def deliver(self, connection, batch):
+        sent = []
+        failed = 0
+        try:
+            connection.open()
+        except Exception as error:
+            for message in batch:
+                self.fail(message, error)
+            return 0, len(batch)
+        try:
+            for message in batch:
+                try:
+                    connection.send_messages([StoredEmailMessage(message)])
+                except Exception as error:
+                    self.fail(message, error)
+                    failed += 1
+                else:
+                    sent.append(message.pk)
+        finally:
+            connection.close()
+        OutboxMessage.objects.filter(pk__in=sent).update(
+            status=OutboxMessage.SENT,
+            attempts=F('attempts') + 1,
+            sent_at=timezone.now(),
+            last_error='',
+        )
+        return len(sent), failed
+
+    def fail(self, message, error):
+        message.attempts += 1
+        message.last_error = repr(error)
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.status = OutboxMessage.DEAD
+            self.stderr.write(f'Письмо {message.pk} не доставлено: {error!r}')
+        else:
+            message.status = OutboxMessage.PENDING
+            delay = settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1)
+            message.next_attempt_at = timezone.now() + timedelta(
+                seconds=delay
+            )
+        message.save(update_fields=(
+            'attempts', 'last_error', 'status', 'next_attempt_at'
+        ))
@@ -0,0 +1,129 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import pragma_statements
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'author_id INTEGER NOT NULL, '
+    'text TEXT NOT NULL, '
+    'pub_date REAL NOT NULL)',
+    'CREATE INDEX post_author ON post (author_id, pub_date)',
+    'CREATE INDEX post_date ON post (pub_date)',
+)
+READ_SQL = 'SELECT id, text FROM post ORDER BY pub_date DESC LIMIT 10'
+AUTHOR_SQL = (
+    'SELECT id, text FROM post WHERE author_id = ? '
+    'ORDER BY pub_date DESC LIMIT 10'
+)
+WRITE_SQL = 'INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)'
+AUTHORS = 100
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite при нескольких '
+            'одновременных воркерах с настройками по умолчанию и с '
+            'SQLITE_PRAGMAS и постоянными подключениями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность каждого прогона в секундах.'
+        )
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля операций записи.'
+        )
+        parser.add_argument('--rows', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        scenarios = (
+            ('default', {}, False),
+            ('tuned', settings.SQLITE_PRAGMAS, True),
+        )
+        for name, pragmas, persistent in scenarios:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, 'bench.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                stats = self.run(path, pragmas, persistent, options)
+            duration = options['duration']
+            self.stdout.write(
+                f'{name:>8}: reads {stats["reads"] / duration:9.1f}/s, '
+                f'writes {stats["writes"] / duration:8.1f}/s, '
+                f'locked errors {stats["locked"]}'
+            )
+
+    def connect(self, path, pragmas):
+        connection = sqlite3.connect(path, timeout=5)
+        for statement in pragma_statements(pragmas):
+            connection.execute(statement)
+        return connection
+
+    def prepare(self, path, pragmas, rows):
+        connection = self.connect(path, pragmas)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        now = time.time()
+        connection.executemany(WRITE_SQL, (
+            (number % AUTHORS, f'Текст поста {number}', now - number)
+            for number in range(rows)
+        ))
+        connection.commit()
+        connection.close()
+
+    def run(self, path, pragmas, persistent, options):
+        stats = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def worker():
+            local = {'reads': 0, 'writes': 0, 'locked': 0}
+            connection = self.connect(path, pragmas) if persistent else None
+            while time.monotonic() < deadline:
+                # Без постоянных подключений каждая операция,
+                # как отдельный запрос, открывает новое подключение.
+                current = connection or self.connect(path, pragmas)
+                try:
+                    if random.random() < options['write_ratio']:
+                        current.execute(WRITE_SQL, (
+                            random.randrange(AUTHORS), 'Новый пост',
+                            time.time()
+                        ))
+                        current.commit()
+                        local['writes'] += 1
+                    else:
+                        current.execute(READ_SQL).fetchall()
+                        current.execute(
+                            AUTHOR_SQL, (random.randrange(AUTHORS),)
+                        ).fetchall()
+                        local['reads'] += 1
+                except sqlite3.OperationalError:
+                    current.rollback()
+                    local['locked'] += 1
+                finally:
+                    if connection is None:
+                        current.close()
+            if connection is not None:
+                connection.close()
+            with lock:
+                for key, value in local.items():
+                    stats[key] += value
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return stats
@@ -0,0 +1,328 @@
+import fcntl
+import glob
+import json
+import os
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+METRICS_FILE_RE = re.compile(
+    r'metrics-(?P<host>.+)-(?P<pid>\d+)-(?P<start>\w+)\.json$'
+)
+DEAD_WORKERS_FILE = 'dead-workers.json'
+LOCK_FILE = 'metrics.lock'
+
+METRICS = {
+    'yatube_http_requests_total': (
+        'counter', 'Количество обработанных запросов.'
+    ),
+    'yatube_http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.'
+    ),
+    'yatube_db_queries_per_request': (
+        'histogram', 'Количество SQL-запросов на один запрос.'
+    ),
+    'yatube_page_cache_requests_total': (
+        'counter', 'Обращения к кэшу страниц: попадания и промахи.'
+    ),
+}
+
+
+class Registry:
+    """Хранилище метрик одного процесса.
+
+    Метрика идентифицируется именем и кортежем пар меток. Снимок
+    реестра сериализуется в JSON, поэтому метрики разных воркеров
+    собираются из файлов в ``METRICS_DIR`` и суммируются. Имя файла
+    содержит хост, pid и время запуска процесса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.flushed = 0
+        self.pid = None
+        self.file_name = None
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * len(buckets),
+                    'sum': 0,
+                    'count': 0,
+                }
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, dict(histogram,
+                                        counts=list(histogram['counts']))]
+                    for (name, labels), histogram
+                    in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Сохраняет снимок процесса в общий каталог метрик.
+
+        Временный файл у процесса один, поэтому потоки записывают его
+        по очереди.
+        """
+        metrics_dir = settings.METRICS_DIR
+        if not metrics_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        os.makedirs(metrics_dir, exist_ok=True)
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.file_name = 'metrics-{}-{}-{}.json'.format(
+                socket.gethostname(), pid, process_start(pid)
+            )
+        with self.flush_lock:
+            write_json(
+                os.path.join(metrics_dir, self.file_name), self.snapshot()
+            )
+
+
+registry = Registry()
+
+
+def record_request(view_name, method, status, duration, queries,
+                   cache_result=None):
+    labels = {'view': view_name}
+    registry.inc('yatube_http_requests_total', dict(
+        labels, method=method, status=str(status)
+    ))
+    registry.observe(
+        'yatube_http_request_duration_seconds', labels, duration,
+        LATENCY_BUCKETS
+    )
+    registry.observe(
+        'yatube_db_queries_per_request', labels, queries, QUERY_BUCKETS
+    )
+    if cache_result is not None:
+        registry.inc('yatube_page_cache_requests_total', dict(
+            labels, result=cache_result
+        ))
+    registry.flush()
+
+
+def write_json(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as data_file:
+        json.dump(data, data_file)
+    os.replace(tmp_path, path)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_start(pid):
+    """Время запуска процесса в тиках с загрузки системы или ``None``,
+    если процесса нет.
+
+    Вместе с pid оно отличает воркер от нового процесса, получившего
+    тот же pid. Без /proc известно только, занят ли pid.
+    """
+    if not os.path.exists('/proc/self/stat'):
+        return '0' if process_alive(pid) else None
+    try:
+        with open(f'/proc/{pid}/stat', encoding='utf-8') as stat_file:
+            # Имя процесса в скобках может содержать пробелы.
+            return stat_file.read().rsplit(')', 1)[1].split()[19]
+    except FileNotFoundError:
+        return None
+
+
+def is_dead(match):
+    """Завершился ли воркер файла ``match``.
+
+    Процессы других хостов отсюда не видны: их файлы разбирает сбор
+    метрик на своем хосте.
+    """
+    return (
+        match['host'] == socket.gethostname()
+        and process_start(int(match['pid'])) != match['start']
+    )
+
+
+@contextmanager
+def metrics_dir_lock():
+    """Межпроцессная блокировка каталога метрик на время сбора."""
+    path = os.path.join(settings.METRICS_DIR, LOCK_FILE)
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_snapshots():
+    """Возвращает снимки всех воркеров, включая текущий процесс.
+
+    Счетчики завершившихся воркеров переносятся в ``DEAD_WORKERS_FILE``,
+    как в multiprocess-режиме prometheus_client: сумма не уменьшается,
+    и Prometheus не видит сброса счетчиков. Файл помнит имена
+    перенесенных снимков, поэтому снимок, который не удалось удалить,
+    не будет учтен дважды. Сбор идет под блокировкой каталога, чтобы
+    параллельный сбор не увидел снимок ни в одном из файлов.
+    """
+    if not settings.METRICS_DIR:
+        return [registry.snapshot()]
+    registry.flush(force=True)
+    dead_path = os.path.join(settings.METRICS_DIR, DEAD_WORKERS_FILE)
+    with metrics_dir_lock():
+        try:
+            with open(dead_path, encoding='utf-8') as dead_file:
+                archive = json.load(dead_file)
+        except FileNotFoundError:
+            archive = {'counters': [], 'histograms': [], 'merged': []}
+        snapshots = []
+        dead = {}
+        pattern = os.path.join(settings.METRICS_DIR, 'metrics-*.json')
+        for path in sorted(glob.glob(pattern)):
+            name = os.path.basename(path)
+            match = METRICS_FILE_RE.match(name)
+            if match is None:
+                continue
+            if not is_dead(match):
+                with open(path, encoding='utf-8') as metrics_file:
+                    snapshots.append(json.load(metrics_file))
+            elif name in archive['merged']:
+                os.remove(path)
+            else:
+                with open(path, encoding='utf-8') as metrics_file:
+                    dead[path] = json.load(metrics_file)
+        if dead:
+            archive = dict(
+                to_snapshot(*merge_snapshots([archive, *dead.values()])),
+                merged=[os.path.basename(path) for path in dead],
+            )
+            write_json(dead_path, archive)
+            for path in dead:
+                os.remove(path)
+    snapshots.append(archive)
+    return snapshots
+
+
+def merge_snapshots(snapshots):
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(
+                    histogram, counts=list(histogram['counts'])
+                )
+                continue
+            merged['counts'] = [
+                left + right for left, right
+                in zip(merged['counts'], histogram['counts'])
+            ]
+            merged['sum'] += histogram['sum']
+            merged['count'] += histogram['count']
+    return counters, histograms
+
+
+def to_snapshot(counters, histograms):
+    """Обратное к ``merge_snapshots``: сумма в формате снимка."""
+    return {
+        'counters': [
+            [name, [list(pair) for pair in labels], value]
+            for (name, labels), value in counters.items()
+        ],
+        'histograms': [
+            [name, [list(pair) for pair in labels], histogram]
+            for (name, labels), histogram in histograms.items()
+        ],
+    }
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def render_prometheus(snapshots):
+    """Формирует текстовый формат экспозиции Prometheus."""
+    counters, histograms = merge_snapshots(snapshots)
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{format_labels(labels)} {value}')
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip(histogram['buckets'],
+                                    histogram['counts']):
+                bucket_labels = labels + (('le', repr(float(bound))),)
+                lines.append(
+                    f'{name}_bucket{format_labels(bucket_labels)} {count}'
+                )
+            inf_labels = labels + (('le', '+Inf'),)
+            lines.append(
+                f'{name}_bucket{format_labels(inf_labels)} '
+                f'{histogram["count"]}'
+            )
+            lines.append(
+                f'{name}_sum{format_labels(labels)} {histogram["sum"]}'
+            )
+            lines.append(
+                f'{name}_count{format_labels(labels)} {histogram["count"]}'
+            )
+    return '\n'.join(lines) + '\n'
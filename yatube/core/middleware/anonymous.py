@@ -0,0 +1,75 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+
+from core.cache import SAFE_METHODS, cached_response
+
+GENERATION_KEY = 'anonymous_fast_path:generation'
+ALLOWED_PARAMS = {'page', 'after'}
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(GENERATION_KEY, generation, None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_anonymous_cache():
+    """Делает недействительными все сохраненные анонимные страницы."""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+class AnonymousFastPathMiddleware:
+    """Отдает анонимным читателям заранее отрендеренные страницы.
+
+    Стоит до SessionMiddleware: на попадании в кэш не выполняются
+    ни сессии, ни аутентификация, ни контекст-процессоры. Быстрый путь
+    используется только для GET и HEAD без cookie и без заголовка
+    Authorization, к view из ``ANONYMOUS_FAST_PATH_VIEWS`` и с параметрами
+    запроса не шире ``page`` и ``after``. В кэш попадают только ответы 200
+    без Set-Cookie и без запрета кэширования. Одновременные промахи
+    объединяются, как в ``core.cache.cached_response``. Любые изменения
+    постов, групп, комментариев и пользователей сбрасывают все страницы
+    разом.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        match = self.get_match(request)
+        if match is None:
+            return self.get_response(request)
+        key = 'anonymous_fast_path:{}:{}'.format(
+            get_generation(),
+            hashlib.md5(request.get_full_path().encode()).hexdigest()
+        )
+        response = cached_response(
+            request,
+            key,
+            lambda: self.get_response(request),
+            settings.ANONYMOUS_FAST_PATH_TIMEOUT,
+        )
+        if request.page_cache_hit:
+            request.resolver_match = match
+        return response
+
+    def get_match(self, request):
+        if (request.method not in SAFE_METHODS
+                or request.COOKIES
+                or 'HTTP_AUTHORIZATION' in request.META
+                or not ALLOWED_PARAMS.issuperset(request.GET)):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.view_name not in settings.ANONYMOUS_FAST_PATH_VIEWS:
+            return None
+        return match
@@ -0,0 +1,105 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core.metrics import record_request
+
+UNRESOLVED_VIEW = 'unresolved'
+
+
+class QueryCounter:
+    """Считает SQL-запросы на всех подключениях, пока активен."""
+
+    def __init__(self):
+        self.count = 0
+
+    def execute(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(
+                connection.execute_wrapper(self.execute)
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов по имени view.
+
+    Считает запросы, время ответа и количество SQL-запросов
+    на всех подключениях, а для кэшируемых страниц — попадания
+    в кэш. Должен стоять первым в ``MIDDLEWARE``, чтобы учитывать
+    работу остальных middleware. Потоковый ответ рендерится уже после
+    выхода из middleware, поэтому его метрики записываются, когда поток
+    закончится: время — до последнего куска, запросы — вместе с теми,
+    что выполнили шаблоны.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with queries:
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = measured_stream(
+                response.streaming_content, queries,
+                lambda: self.record(request, response, started, queries),
+            )
+        else:
+            self.record(request, response, started, queries)
+        return response
+
+    def record(self, request, response, started, queries):
+        duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        record_request(
+            match.view_name if match else UNRESOLVED_VIEW,
+            request.method,
+            response.status_code,
+            duration,
+            queries.count,
+            page_cache_result(request),
+        )
+
+
+def measured_stream(content, queries, finish):
+    """Отдает куски потока, считая запросы, которые выполняются при их
+    рендеринге, и вызывает ``finish`` после последнего куска или обрыва.
+    """
+    try:
+        iterator = iter(content)
+        while True:
+            with queries:
+                chunk = next(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        finish()
+
+
+def page_cache_result(request):
+    """Определяет, была ли страница отдана из кэша.
+
+    Свои механизмы кэширования выставляют ``request.page_cache_hit``,
+    для ``cache_page`` используется флаг, который Django ставит
+    в FetchFromCacheMiddleware.
+    """
+    hit = getattr(request, 'page_cache_hit', None)
+    if hit is None and request.method in ('GET', 'HEAD'):
+        update_cache = getattr(request, '_cache_update_cache', None)
+        if update_cache is not None:
+            hit = not update_cache
+    if hit is None:
+        return None
+    return 'hit' if hit else 'miss'
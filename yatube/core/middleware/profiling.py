@@ -0,0 +1,98 @@
+import cProfile
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+PROFILING_SALT = 'core.profiling'
+PROFILING_HEADER = 'HTTP_X_YATUBE_PROFILE'
+PROFILING_PARAM = '_profile'
+
+
+def make_profiling_token():
+    """Возвращает подписанный токен для включения профилирования."""
+    return signing.TimestampSigner(salt=PROFILING_SALT).sign('profile')
+
+
+def check_profiling_token(token):
+    try:
+        signing.TimestampSigner(salt=PROFILING_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """Запускает view под cProfile по запросу сотрудника.
+
+    Профилирование включается подписанным токеном в заголовке
+    ``X-Yatube-Profile`` или в параметре ``_profile``. Результат
+    сохраняется в ``PROFILING_DIR``: файл статистики ``.prof`` и рядом
+    ``.json`` с адресом, view и временем выполнения запроса.
+    Профилируемая страница рендерится целиком, без потока
+    (``request.full_body_required``), иначе шаблоны рендерились бы уже
+    после выхода из профилировщика. Middleware должен стоять последним,
+    чтобы остальные process_view уже отработали к моменту вызова view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        token = (request.META.get(PROFILING_HEADER)
+                 or request.GET.get(PROFILING_PARAM))
+        if not token or not request.user.is_staff:
+            return None
+        if not check_profiling_token(token):
+            return None
+        request.full_body_required = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            return profiler.runcall(
+                render_view, view_func, request, view_args, view_kwargs
+            )
+        finally:
+            duration = time.perf_counter() - started
+            save_profile(request, profiler, duration)
+
+
+def render_view(view_func, request, view_args, view_kwargs):
+    """Вызывает view и сразу рендерит отложенный TemplateResponse,
+    чтобы рендеринг шаблонов class-based views попал в профиль.
+    """
+    response = view_func(request, *view_args, **view_kwargs)
+    if callable(getattr(response, 'render', None)):
+        response = response.render()
+    return response
+
+
+def save_profile(request, profiler, duration):
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    now = timezone.now()
+    view_name = request.resolver_match.view_name
+    name = '{}-{}-{}'.format(
+        now.strftime('%Y%m%d%H%M%S%f'),
+        os.getpid(),
+        view_name.replace(':', '.'),
+    )
+    path = os.path.join(settings.PROFILING_DIR, name)
+    profiler.dump_stats(f'{path}.prof')
+    meta = {
+        'path': request.get_full_path(),
+        'method': request.method,
+        'view_name': view_name,
+        'duration': duration,
+        'created': now.isoformat(),
+        'user': request.user.get_username(),
+    }
+    with open(f'{path}.json', 'w', encoding='utf-8') as meta_file:
+        json.dump(meta, meta_file, ensure_ascii=False)
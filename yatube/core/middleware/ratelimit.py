@@ -0,0 +1,41 @@
+from django.conf import settings
+
+from core.ratelimit import check_ratelimit, too_many_requests
+
+
+class RateLimitMiddleware:
+    """Применяет лимиты из ``RATELIMITS`` к view по имени URL.
+
+    ``RATELIMITS`` сопоставляет имени URL словарь с ключами ``rate``
+    (например, ``'10/m'``) — лимитом пользователя, ``ip_rate`` — лимитом
+    адреса, ``methods`` и ``scope`` — общим именем корзин для нескольких
+    адресов одного действия. Проверка выполняется до CSRF и view,
+    а корзина адреса — до сессии, так что запрос, отклоненный по IP,
+    не обращается к базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.RATELIMIT_ENABLED:
+            return None
+        match = request.resolver_match
+        config = settings.RATELIMITS.get(match.view_name if match else None)
+        if config is None:
+            return None
+        methods = config.get('methods')
+        if methods is not None and request.method not in methods:
+            return None
+        retry_after = check_ratelimit(
+            request,
+            config.get('scope', match.view_name),
+            config['rate'],
+            config.get('ip_rate'),
+        )
+        if retry_after:
+            return too_many_requests(retry_after)
+        return None
@@ -0,0 +1,41 @@
+from django.conf import settings
+
+from core.routers import use_replica, wrote_to_primary
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class ReplicaMiddleware:
+    """Включает чтение из реплик для view из ``REPLICA_READ_VIEWS``.
+
+    Запрос, в котором была запись в основную базу, ставит cookie,
+    и следующие ``REPLICA_PIN_SECONDS`` секунд все запросы этого
+    пользователя читают из основной базы, пока реплика догоняет.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_replica(False)
+        try:
+            response = self.get_response(request)
+            if wrote_to_primary():
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            use_replica(False)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        use_replica(
+            request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name
+            in settings.REPLICA_READ_VIEWS
+        )
@@ -0,0 +1,161 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """``'10/m'`` -> ``(10, 60)``: число запросов и длина окна."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+class Window:
+    """Скользящее окно корзины в момент ``now``.
+
+    Хранятся только счетчики двух фиксированных окон периода: текущего
+    и предыдущего. Число запросов за последний период оценивается как
+    счетчик текущего окна плюс доля предыдущего, которая еще попадает
+    в скользящее окно, поэтому на границе окон клиент не получает
+    двойной лимит.
+    """
+
+    def __init__(self, key, rate, now):
+        self.limit, self.period = parse_rate(rate)
+        start = int(now // self.period) * self.period
+        self.key = f'{key}:{start}'
+        self.previous_key = f'{key}:{start - self.period}'
+        self.elapsed = now - start
+        self.weight = 1 - self.elapsed / self.period
+
+    def estimate(self, previous, current):
+        return previous * self.weight + current
+
+    def retry_after(self, previous, current):
+        """Через сколько секунд в окно поместится еще один запрос,
+        или 0, если он помещается сейчас.
+        """
+        free = self.limit - 1
+        if self.estimate(previous, current) <= free:
+            return 0
+        if current <= free:
+            # Хватит, чтобы доля предыдущего окна уменьшилась.
+            wait = self.period * (1 - (free - current) / previous)
+            wait -= self.elapsed
+        else:
+            # Текущее окно станет предыдущим и должно уменьшиться.
+            wait = self.period - self.elapsed
+            wait += self.period * (1 - free / current)
+        return max(math.ceil(wait), 1)
+
+    def counts(self):
+        counts = cache.get_many([self.previous_key, self.key])
+        return counts.get(self.previous_key, 0), counts.get(self.key, 0)
+
+    def debit(self):
+        """Атомарно списывает запрос и возвращает новый счетчик окна."""
+        # Счетчик нужен и следующему окну как предыдущий.
+        timeout = math.ceil(2 * self.period - self.elapsed) + 1
+        cache.add(self.key, 0, timeout)
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            # Запись истекла между add и incr.
+            cache.add(self.key, 1, timeout)
+            return 1
+
+
+def ip_rate_for(rate):
+    """Лимит по IP по умолчанию: ``RATELIMIT_IP_FACTOR`` лимитов
+    пользователя, потому что за одним адресом бывает целая сеть.
+    """
+    count, _, period = rate.partition('/')
+    return f'{int(count) * settings.RATELIMIT_IP_FACTOR}/{period}'
+
+
+def client_buckets(request, scope, rate, ip_rate=None):
+    """Корзины клиента ``(ключ, лимит)``: по IP со своим, большим
+    лимитом и по пользователю, если он вошел.
+
+    Корзина IP идет первой: ее ключ известен без сессии, и если она
+    переполнена, ``request.user`` не читается вовсе. Сессию клиент
+    может сменить в любой момент, поэтому корзина пользователя строится
+    по ``request.user.pk``, а не по cookie.
+    """
+    address = request.META.get(settings.RATELIMIT_IP_META, '')
+    address = address.split(',')[0].strip()
+    yield f'ratelimit:{scope}:ip:{address}', ip_rate or ip_rate_for(rate)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        yield f'ratelimit:{scope}:user:{user.pk}', rate
+
+
+def check_ratelimit(request, scope, rate, ip_rate=None, now=None):
+    """Возвращает, сколько секунд клиенту ждать, или 0.
+
+    Корзины проверяются по очереди, и первая переполненная сразу дает
+    отказ, так что запрос, отклоненный по IP, не трогает сессию и базу.
+    Запрос списывается атомарным ``cache.incr``, только если место
+    нашлось во всех корзинах, поэтому параллельные запросы клиента
+    не теряют списаний.
+    """
+    if now is None:
+        now = time.time()
+    windows = []
+    for key, bucket_rate in client_buckets(request, scope, rate, ip_rate):
+        window = Window(key, bucket_rate, now)
+        previous, current = window.counts()
+        retry_after = window.retry_after(previous, current)
+        if retry_after:
+            return retry_after
+        windows.append((window, previous))
+    retry_after = 0
+    for window, previous in windows:
+        current = window.debit()
+        # Параллельный запрос мог занять последнее место после проверки.
+        if window.estimate(previous, current) > window.limit:
+            retry_after = max(
+                retry_after, window.retry_after(previous, current)
+            )
+    return retry_after
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(rate, methods=None, scope=None, ip_rate=None):
+    """Ограничивает частоту запросов к view.
+
+    ``methods`` — методы, к которым применяется лимит (по умолчанию все),
+    ``scope`` — имя набора корзин (по умолчанию путь к view),
+    ``ip_rate`` — лимит корзины IP (по умолчанию ``ip_rate_for(rate)``).
+    """
+    def decorator(view_func):
+        bucket_scope = scope or (
+            f'{view_func.__module__}.{view_func.__qualname__}'
+        )
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and (
+                    methods is None or request.method in methods):
+                retry_after = check_ratelimit(
+                    request, bucket_scope, rate, ip_rate
+                )
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,44 @@
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+state = threading.local()
+
+
+def use_replica(enabled):
+    state.use_replica = enabled
+    state.wrote = False
+
+
+def wrote_to_primary():
+    return getattr(state, 'wrote', False)
+
+
+class ReplicaRouter:
+    """Направляет чтение в реплики, а запись — в основную базу.
+
+    Реплика используется только там, где ReplicaMiddleware разрешил это
+    для текущего запроса. После первой записи в запросе чтение тоже
+    возвращается в основную базу, чтобы видеть свои изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (replicas and getattr(state, 'use_replica', False)
+                and not wrote_to_primary()):
+            return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,183 @@
+import atexit
+import collections
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+
+def fold_frame(frame, labels):
+    """Сворачивает стек в строку формата flamegraph: от корня к листу."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        label = labels.get(code)
+        if label is None:
+            label = labels[code] = '{} ({}:{})'.format(
+                code.co_name,
+                os.path.basename(code.co_filename),
+                code.co_firstlineno,
+            )
+        names.append(label)
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def read_folded(path):
+    with open(path, encoding='utf-8') as folded_file:
+        for line in folded_file:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                yield stack, int(count)
+
+
+def merge_folded(paths):
+    """Объединяет несколько folded-файлов в один счетчик стеков."""
+    merged = collections.Counter()
+    for path in paths:
+        for stack, count in read_folded(path):
+            merged[stack] += count
+    return merged
+
+
+def write_folded(path, samples):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as folded_file:
+        for stack, count in sorted(samples.items()):
+            folded_file.write(f'{stack} {count}\n')
+    os.replace(tmp_path, path)
+
+
+class SamplingProfiler:
+    """Сэмплирующий профайлер стеков всех потоков воркера.
+
+    Основной режим — интервальный таймер ``ITIMER_PROF``: сигнал приходит
+    только пока процесс тратит CPU, обработчик снимает стеки через
+    ``sys._current_frames()`` и увеличивает счетчик свернутого стека.
+    Если таймер недоступен (не главный поток, нет setitimer), стеки
+    снимает фоновый поток. Сэмплы раз в ``flush_interval`` секунд
+    сбрасываются в отдельный файл ``<host>-<pid>-<n>.folded``, в каталоге
+    хранится не более ``max_files`` файлов на воркер.
+    """
+
+    def __init__(self, output_dir, interval=0.01, flush_interval=60,
+                 max_files=100):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.max_files = max_files
+        self.samples = collections.Counter()
+        self.labels = {}
+        self.sequence = 0
+        self.running = False
+        self.mode = None
+        self.ignored_threads = set()
+        self.stop_event = threading.Event()
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.running = True
+        self.stop_event.clear()
+        try:
+            signal.signal(signal.SIGPROF, self.handle_signal)
+            signal.setitimer(
+                signal.ITIMER_PROF, self.interval, self.interval
+            )
+            self.mode = 'signal'
+        except (AttributeError, ValueError):
+            self.mode = 'thread'
+            self.spawn(self.sample_loop, 'sampling-profiler')
+        self.spawn(self.flush_loop, 'sampling-profiler-flush')
+        atexit.register(self.stop)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.mode == 'signal':
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        self.flush()
+
+    def spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self.ignored_threads.add(thread.ident)
+
+    def handle_signal(self, signum, frame):
+        self.sample(frame)
+
+    def sample_loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self, current_frame=None):
+        samples = self.samples
+        current_thread = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id in self.ignored_threads:
+                continue
+            if thread_id == current_thread:
+                if current_frame is None:
+                    continue
+                frame = current_frame
+            samples[fold_frame(frame, self.labels)] += 1
+
+    def flush_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        pending, self.samples = self.samples, collections.Counter()
+        # dict.copy не прерывается обработчиком сигнала, в отличие от
+        # итерации по счетчику, в который обработчик еще может писать.
+        samples = dict.copy(pending)
+        if not samples:
+            return None
+        prefix = f'{socket.gethostname()}-{os.getpid()}-'
+        path = os.path.join(
+            self.output_dir,
+            '{}{}-{}.folded'.format(
+                prefix, int(time.time()), self.sequence
+            )
+        )
+        self.sequence += 1
+        write_folded(path, samples)
+        self.rotate(prefix)
+        return path
+
+    def rotate(self, prefix):
+        names = sorted(
+            (name for name in os.listdir(self.output_dir)
+             if name.startswith(prefix) and name.endswith('.folded')),
+            key=lambda name: (
+                os.path.getmtime(os.path.join(self.output_dir, name)), name
+            )
+        )
+        for name in names[:-self.max_files]:
+            os.remove(os.path.join(self.output_dir, name))
+
+
+profiler = None
+
+
+def start_from_settings():
+    """Запускает профайлер воркера, если он включен в настройках."""
+    global profiler
+    if not settings.SAMPLING_PROFILER_ENABLED or profiler is not None:
+        return profiler
+    profiler = SamplingProfiler(
+        settings.SAMPLING_PROFILER_DIR,
+        interval=settings.SAMPLING_PROFILER_INTERVAL,
+        flush_interval=settings.SAMPLING_PROFILER_FLUSH_INTERVAL,
+        max_files=settings.SAMPLING_PROFILER_MAX_FILES,
+    )
+    profiler.start()
+    return profiler
@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.html', '.json', '.xml'
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def compressed_variants():
+    variants = [('gzip', '.gz')]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br'))
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и сжатыми копиями.
+
+    При collectstatic рядом с каждым текстовым файлом (и его хешированной
+    копией) сохраняются ``.gz`` и, если установлен brotli, ``.br``.
+    Если файла нет в манифесте (разработка, тесты без collectstatic),
+    отдается исходное имя, а не ошибка.
+    """
+
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in self.hashed_files.items():
+            for target in {name, hashed_name}:
+                if target.endswith(COMPRESSIBLE_EXTENSIONS):
+                    self.compress(target)
+
+    def compress(self, name):
+        path = self.path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for encoding, suffix in compressed_variants():
+            if encoding == 'br':
+                compressed = brotli.compress(data)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+def content_hash(content):
+    """sha256 содержимого файла; позиция чтения возвращается в начало."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def sharded_name(directory, digest, filename):
+    """``posts/ab/cd/abcd….jpg``: два уровня по 256 каталогов."""
+    extension = os.path.splitext(filename)[1].lower()
+    return posixpath.join(
+        directory, digest[:2], digest[2:4], digest + extension
+    )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по хешу содержимого.
+
+    Файл ``posts/photo.jpg`` сохраняется как ``posts/ab/cd/<sha256>.jpg``:
+    верхний каталог из ``upload_to`` сохраняется, остальное имя заменяется
+    хешем. Одинаковое содержимое дает одинаковое имя, поэтому повторная
+    загрузка того же файла ничего не пишет и не получает суффикс,
+    а просто ссылается на уже сохраненный файл. Запись идет через
+    временный файл и ``os.replace``, так что два процесса, одновременно
+    сохраняющие одну картинку, не мешают друг другу. При повторной
+    загрузке у файла обновляется время изменения, чтобы ``media_gc``
+    с ``--min-age`` не удалил его, пока новый пост еще не сохранен.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def content_name(self, name, content):
+        directory = name.split('/')[0] if '/' in name else ''
+        return sharded_name(directory, content_hash(content), name)
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        full_path = self.path(name)
+        try:
+            os.utime(full_path)
+            return name
+        except FileNotFoundError:
+            pass
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                content.seek(0)
+                for chunk in content.chunks():
+                    target.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.template.loader_tags import (BLOCK_CONTEXT_KEY, BlockContext,
+                                         BlockNode, ExtendsNode)
+from django.utils.cache import patch_vary_headers
+
+# Граница, на которой накопленный текст отправляется клиенту.
+FLUSH = object()
+
+
+def stream_nodelist(nodelist, context):
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from stream_extends(node, context)
+        elif isinstance(node, BlockNode):
+            yield from stream_block(node, context)
+        else:
+            yield node.render_annotated(context)
+
+
+def stream_extends(node, context):
+    """Повторяет ``ExtendsNode.render``, но отдает родителя по частям."""
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block
+                    for block in parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from stream_nodelist(parent.nodelist, context)
+
+
+def stream_block(node, context):
+    """Повторяет ``BlockNode.render``. Перед каждым блоком все, что уже
+    отрендерено, уходит клиенту.
+    """
+    yield FLUSH
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context['block'] = node
+            yield from stream_nodelist(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context['block'] = block
+        yield from stream_nodelist(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def stream_template(template, context):
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from stream_nodelist(template.nodelist, context)
+
+
+def chunked(parts, size):
+    """Склеивает части в куски не меньше ``size`` символов, отправляя
+    кусок раньше только на границе блока.
+    """
+    buffer = []
+    length = 0
+    for part in parts:
+        if part is not FLUSH:
+            buffer.append(part)
+            length += len(part)
+            if length < size:
+                continue
+        if buffer:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_streaming(request, template_name, context=None,
+                     content_type=None, status=None):
+    """Аналог ``render``, который отдает страницу по мере рендеринга.
+
+    Шапка из ``base.html`` уходит клиенту до того, как начнет
+    рендериться блок контента, поэтому время до первого байта не зависит
+    от длины страницы. Страница рендерится целиком, как обычно, если
+    поток выключен в ``STREAMING_RENDER_ENABLED`` или если ответ сохранят
+    в кэш или профилируют (``request.full_body_required``).
+
+    Заголовки отправляются раньше, чем отрендерен шаблон, поэтому
+    CSRF-cookie и ``Vary: Cookie`` выставляются заранее. Ошибка
+    в середине рендеринга обрывает уже начатый ответ.
+    """
+    if (not settings.STREAMING_RENDER_ENABLED
+            or getattr(request, 'full_body_required', False)):
+        return render(request, template_name, context, content_type, status)
+    template = get_template(template_name)
+    context = make_context(
+        context, request, autoescape=template.backend.engine.autoescape
+    )
+    get_token(request)
+    response = StreamingHttpResponse(
+        chunked(
+            stream_template(template.template, context),
+            settings.STREAMING_CHUNK_SIZE,
+        ),
+        content_type=content_type,
+        status=status,
+    )
+    patch_vary_headers(response, ('Cookie',))
+    return response
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class AnonymousFastPathTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста',
+            author=cls.author,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_anonymous_pages_served_without_queries(self):
+        """Повторный анонимный запрос отдается из кэша без SQL."""
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                with self.assertNumQueries(0):
+                    cached_response = self.guest_client.get(address)
+                self.assertEqual(response.content, cached_response.content)
+                self.assertEqual(
+                    response['Content-Type'],
+                    cached_response['Content-Type']
+                )
+
+    def test_fast_path_fallbacks(self):
+        """Запросы с cookie и лишними параметрами идут обычным путем:
+           страница не кэшируется и отдается потоком.
+        """
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.guest_client.get(address)
+        cookie_client = Client()
+        cookie_client.cookies['sessionid'] = 'unknown'
+        requests = {
+            'cookie': lambda: cookie_client.get(address),
+            'param': lambda: self.guest_client.get(address, {'q': 1}),
+        }
+        for name, request in requests.items():
+            with self.subTest(name=name):
+                response = request()
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                self.assertIn(
+                    self.post.text.encode(),
+                    b''.join(response.streaming_content)
+                )
+
+    def test_changes_invalidate_cached_pages(self):
+        """Новый пост сразу появляется на анонимных страницах."""
+        address = reverse('posts:profile', kwargs={'username': self.author})
+        self.guest_client.get(address)
+        Post.objects.create(text='Новый пост автора', author=self.author)
+        response = self.guest_client.get(address)
+        self.assertContains(response, 'Новый пост автора')
@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase
+
+from core.bloom import BloomFilter
+
+
+class BloomFilterTests(SimpleTestCase):
+    def bloom(self, values, capacity=10000):
+        bloom = BloomFilter.for_capacity(capacity, 0.01)
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    def test_no_false_negatives(self):
+        """Все добавленные значения находятся."""
+        bloom = self.bloom(f'user{number}' for number in range(10000))
+        self.assertTrue(all(
+            f'user{number}' in bloom for number in range(10000)
+        ))
+
+    def test_false_positive_rate(self):
+        """Доля ложных срабатываний близка к заданной."""
+        bloom = self.bloom(range(10000))
+        false_positives = sum(
+            number in bloom for number in range(10000, 30000)
+        )
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_sizing(self):
+        """При 1 % — около 9.6 бита и 7 хешей на элемент."""
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        self.assertAlmostEqual(bloom.size / 1000, 9.6, delta=0.1)
+        self.assertEqual(bloom.hashes, 7)
+
+    def test_serialization(self):
+        bloom = self.bloom(['cats', 'dogs'], capacity=100)
+        restored = BloomFilter.from_bytes(bloom.to_bytes())
+        self.assertEqual(restored.bits, bloom.bits)
+        self.assertEqual(restored.hashes, bloom.hashes)
+        self.assertIn('cats', restored)
+        with self.assertRaises(ValueError):
+            BloomFilter(64, 3, bytes(4))
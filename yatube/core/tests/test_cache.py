@@ -0,0 +1,78 @@
+import time
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import get_or_rebuild, shared_timeout
+
+KEY = 'test_key'
+
+
+class StampedeCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = []
+
+    def build(self):
+        self.builds.append(1)
+        return f'value {len(self.builds)}'
+
+    def test_value_is_built_once(self):
+        """Пока запись свежая, она не пересобирается."""
+        for _ in range(3):
+            value = get_or_rebuild(KEY, self.build, 60, beta=0)
+        self.assertEqual(value, 'value 1')
+        self.assertEqual(len(self.builds), 1)
+
+    def test_stale_value_served_while_rebuilding(self):
+        """Устаревшая запись отдается, пока другой процесс держит
+           блокировку, и пересобирается, когда блокировка свободна.
+        """
+        cache.set(KEY, ('stale', time.time() - 1, 0.1), 60)
+        cache.add(f'lock:{KEY}', 1)
+        self.assertEqual(get_or_rebuild(KEY, self.build, 60), 'stale')
+        self.assertEqual(self.builds, [])
+        cache.delete(f'lock:{KEY}')
+        self.assertEqual(get_or_rebuild(KEY, self.build, 60), 'value 1')
+
+    def test_probabilistic_early_refresh(self):
+        """При большом beta запись обновляется до истечения срока."""
+        cache.set(KEY, ('cached', time.time() + 10, 1.0), 60)
+        self.assertEqual(
+            get_or_rebuild(KEY, self.build, 60, beta=10 ** 6), 'value 1'
+        )
+        self.assertEqual(get_or_rebuild(KEY, self.build, 60, beta=0),
+                         'value 1')
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_cold_miss_without_lock_is_not_stored(self):
+        """При холодном промахе без блокировки значение собирается,
+           но не перезаписывает работу владельца блокировки.
+        """
+        cache.add(f'lock:{KEY}', 1)
+        self.assertEqual(get_or_rebuild(KEY, self.build, 60), 'value 1')
+        self.assertIsNone(cache.get(KEY))
+
+    def test_swrcache_tag(self):
+        """Тег swrcache кэширует фрагмент по имени и параметрам."""
+        template = Template(
+            '{% load swr_cache %}'
+            '{% swrcache 60 fragment pk %}{{ text }}{% endswrcache %}'
+        )
+        first = template.render(Context({'pk': 1, 'text': 'первый'}))
+        cached = template.render(Context({'pk': 1, 'text': 'второй'}))
+        other = template.render(Context({'pk': 2, 'text': 'второй'}))
+        self.assertEqual(first, 'первый')
+        self.assertEqual(cached, 'первый')
+        self.assertEqual(other, 'второй')
+
+    @override_settings(LOCAL_CACHE_TIMEOUT=30)
+    def test_shared_timeout(self):
+        """Если кэш не общий, сбрасываемые записи живут недолго."""
+        self.assertEqual(shared_timeout(60 * 60), 30)
+        self.assertEqual(shared_timeout(10), 10)
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        }}):
+            self.assertEqual(shared_timeout(60 * 60), 60 * 60)
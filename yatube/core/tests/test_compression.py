@@ -0,0 +1,61 @@
+import gzip
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from core.middleware.compression import CompressionMiddleware
+
+PAGE = 'Тестовый текст страницы. ' * 50
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+    def process(self, response, request=None):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request or self.request)
+
+    def test_html_compressed_small_and_media_skipped(self):
+        """HTML сжимается, маленькие ответы и картинки — нет."""
+        responses = {
+            'html': (HttpResponse(PAGE), True),
+            'small': (HttpResponse('ok'), False),
+            'image': (HttpResponse(PAGE, content_type='image/gif'), False),
+        }
+        for name, (response, compressed) in responses.items():
+            with self.subTest(name=name):
+                response = self.process(response)
+                self.assertEqual(
+                    response.get('Content-Encoding') == 'gzip', compressed
+                )
+        response = self.process(
+            HttpResponse(PAGE), self.factory.get('/')
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_streaming_response_compressed_by_chunks(self):
+        """Потоковый ответ сжимается по частям без потери данных."""
+        chunks = [PAGE.encode()] * 3
+        response = self.process(StreamingHttpResponse(iter(chunks)))
+        parts = list(response.streaming_content)
+        self.assertEqual(len(parts), len(chunks) + 1)
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+    def test_cached_page_compressed_once(self):
+        """Сжатая копия страницы из кэша берется по ETag."""
+        client = Client(HTTP_ACCEPT_ENCODING='gzip')
+        response = client.get(reverse('posts:index'))
+        cached_response = client.get(reverse('posts:index'))
+        self.assertEqual(cached_response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, cached_response.content)
+        self.assertTrue(cached_response['ETag'].startswith('W/'))
+        etag = cached_response['ETag'][len('W/'):]
+        self.assertEqual(
+            cache.get(f'compressed:gzip:{etag}'), cached_response.content
+        )
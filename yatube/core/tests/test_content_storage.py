@@ -0,0 +1,99 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.storage import ContentAddressedStorage, sharded_name
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xF9\x04'
+    b'\x01\x0A\x00\x01\x00\x2C\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4C\x01\x00\x3B'
+)
+DIGEST = hashlib.sha256(SMALL_GIF).hexdigest()
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            text='Текст',
+            author=self.author,
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_sharded_name(self):
+        """Имя картинки строится по хешу и раскладывается по каталогам."""
+        post = self.create_post('Photo.GIF')
+        self.assertEqual(
+            post.image.name, f'posts/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.gif'
+        )
+        self.assertTrue(os.path.isfile(post.image.path))
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся одним файлом без суффиксов."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(os.listdir(directory), [f'{DIGEST}.gif'])
+
+    def test_save_existing_content_keeps_file(self):
+        """Повторное сохранение того же содержимого не переписывает файл,
+           а только обновляет время изменения для media_gc.
+        """
+        storage = ContentAddressedStorage()
+        name = sharded_name('posts', DIGEST, 'a.gif')
+        self.assertEqual(
+            storage.save('posts/a.gif', ContentFile(SMALL_GIF)), name
+        )
+        path = storage.path(name)
+        os.utime(path, (0, 0))
+        inode = os.stat(path).st_ino
+        self.assertEqual(storage.save(name, ContentFile(SMALL_GIF)), name)
+        self.assertEqual(os.stat(path).st_ino, inode)
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_shard_media_command(self):
+        """Команда переносит старые плоские имена, не удаляя файлы."""
+        old_names = ('posts/old.gif', 'posts/copy.gif')
+        for name in old_names:
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as image:
+                image.write(SMALL_GIF)
+        posts = [
+            Post.objects.create(text='Текст', author=self.author, image=name)
+            for name in old_names
+        ]
+        call_command('shard_media', stdout=StringIO())
+        expected = sharded_name('posts', DIGEST, 'old.gif')
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.image.name, expected)
+        for name in old_names:
+            self.assertTrue(
+                os.path.isfile(os.path.join(TEMP_MEDIA_ROOT, name))
+            )
@@ -0,0 +1,25 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.db import check_connections
+
+
+class DatabaseTuningTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        """Прагмы из SQLITE_PRAGMAS применяются к подключению."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=0)
+    def test_unusable_connection_closed(self):
+        """Подключение, не прошедшее проверку, закрывается."""
+        connection.ensure_connection()
+        with mock.patch('core.db.is_usable', return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            check_connections()
+        close.assert_called_once()
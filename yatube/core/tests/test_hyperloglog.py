@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from core.hyperloglog import HyperLogLog
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def sketch(self, values):
+        sketch = HyperLogLog()
+        for value in values:
+            sketch.add(f'user:{value}')
+        return sketch
+
+    def test_small_counts_exact(self):
+        """Малые количества считаются практически точно."""
+        self.assertEqual(HyperLogLog().count(), 0)
+        self.assertEqual(self.sketch([1, 1, 1]).count(), 1)
+        self.assertEqual(self.sketch(range(50)).count(), 50)
+
+    def test_error_bounded(self):
+        """Ошибка на больших количествах в пределах нескольких процентов."""
+        estimate = self.sketch(range(100000)).count()
+        self.assertAlmostEqual(estimate / 100000, 1, delta=0.05)
+
+    def test_merge_is_union(self):
+        """Объединение скетчей оценивает объединение множеств."""
+        merged = self.sketch(range(0, 6000)).merge(
+            self.sketch(range(3000, 9000))
+        )
+        self.assertAlmostEqual(merged.count() / 9000, 1, delta=0.05)
+
+    def test_serialization(self):
+        """Скетч сохраняется в 4 КиБ и восстанавливается без потерь."""
+        sketch = self.sketch(range(1000))
+        data = sketch.to_bytes()
+        self.assertEqual(len(data), 4096)
+        self.assertEqual(HyperLogLog.from_bytes(data).count(), sketch.count())
+        with self.assertRaises(ValueError):
+            sketch.merge(HyperLogLog(precision=10))
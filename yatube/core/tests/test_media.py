@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.views import serve_media
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_DIR, MEDIA_ACCEL=None)
+class ServeMediaTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_DIR, 'posts'))
+        with open(os.path.join(TEMP_DIR, 'posts', 'small.gif'), 'wb') as f:
+            f.write(CONTENT)
+        with open(os.path.join(TEMP_DIR, 'secret.txt'), 'wb') as f:
+            f.write(b'secret')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def serve(self, path='posts/small.gif', **headers):
+        return serve_media(self.factory.get('/media/' + path, **headers), path)
+
+    def test_full_file(self):
+        """Файл отдается целиком с валидаторами кэша."""
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_not_modified(self):
+        """По совпавшему ETag отдается 304."""
+        etag = self.serve()['ETag']
+        response = self.serve(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        """Range отдает часть файла со статусом 206."""
+        response = self.serve(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            b''.join(response.streaming_content), CONTENT[10:20]
+        )
+        self.assertEqual(
+            response['Content-Range'], f'bytes 10-19/{len(CONTENT)}'
+        )
+        suffix = self.serve(HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(suffix.streaming_content), CONTENT[-5:])
+
+    def test_range_not_satisfiable(self):
+        """Диапазон за концом файла отдает 416."""
+        response = self.serve(HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(
+            response['Content-Range'], f'bytes */{len(CONTENT)}'
+        )
+
+    def test_if_range_mismatch(self):
+        """При устаревшем If-Range файл отдается целиком."""
+        response = self.serve(
+            HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_private_paths(self):
+        """Файлы вне публичных каталогов и выход из MEDIA_ROOT — 404."""
+        for path in ('secret.txt', 'posts/../secret.txt',
+                     'posts/missing.gif', 'posts/.hidden'):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    self.serve(path)
+
+    def test_accel_redirect(self):
+        """Доставка файла передается nginx или Apache."""
+        with self.settings(MEDIA_ACCEL='x-accel-redirect'):
+            response = self.serve()
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_PREFIX + 'posts/small.gif'
+        )
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_ACCEL='x-sendfile'):
+            response = self.serve()
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(TEMP_DIR, 'posts', 'small.gif')
+        )
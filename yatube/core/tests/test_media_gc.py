@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\x00\xFF')
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageCollectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.kept = self.create_post(SMALL_GIF)
+        self.deleted = self.create_post(OTHER_GIF)
+        self.kept_thumbnail = get_thumbnail(self.kept.image, '960x339')
+        self.orphan_thumbnail = get_thumbnail(self.deleted.image, '960x339')
+        self.orphan_path = self.deleted.image.path
+        self.deleted.delete()
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, content):
+        return Post.objects.create(
+            text='Текст',
+            author=self.author,
+            image=SimpleUploadedFile('image.gif', content, 'image/gif'),
+        )
+
+    def media_gc(self, *args):
+        call_command(
+            'media_gc', '--min-age=0', '--rate=0', *args, stdout=StringIO()
+        )
+
+    def thumbnail_exists(self, thumbnail):
+        return os.path.isfile(os.path.join(TEMP_MEDIA_ROOT, thumbnail.name))
+
+    def test_removes_orphans_with_thumbnails(self):
+        """Удаляются картинка без поста и ее миниатюры, остальное цело."""
+        self.media_gc()
+        self.assertFalse(os.path.exists(self.orphan_path))
+        self.assertFalse(self.thumbnail_exists(self.orphan_thumbnail))
+        self.assertTrue(os.path.isfile(self.kept.image.path))
+        self.assertTrue(self.thumbnail_exists(self.kept_thumbnail))
+
+    def test_dry_run(self):
+        """В режиме dry-run файлы не удаляются."""
+        self.media_gc('--dry-run')
+        self.assertTrue(os.path.isfile(self.orphan_path))
+        self.assertTrue(self.thumbnail_exists(self.orphan_thumbnail))
+
+    def test_min_age(self):
+        """Свежие файлы не трогаются."""
+        call_command('media_gc', '--rate=0', stdout=StringIO())
+        self.assertTrue(os.path.isfile(self.orphan_path))
+
+    def test_reference_rechecked_before_delete(self):
+        """Картинка, на которую сослался пост после чтения пачки,
+           не удаляется.
+        """
+        orphan_name = os.path.relpath(self.orphan_path, TEMP_MEDIA_ROOT)
+
+        def attach():
+            Post.objects.create(
+                text='Текст', author=self.author, image=orphan_name
+            )
+
+        target = 'posts.management.commands.media_gc.Throttle.wait'
+        with mock.patch(target, side_effect=attach):
+            self.media_gc()
+        self.assertTrue(os.path.isfile(self.orphan_path))
+        self.assertTrue(self.thumbnail_exists(self.orphan_thumbnail))
+
+    def test_resume_from_checkpoint(self):
+        """Обход продолжается после сохраненного имени."""
+        checkpoint = os.path.join(TEMP_MEDIA_ROOT, '.media_gc.json')
+        orphan_name = os.path.relpath(self.orphan_path, TEMP_MEDIA_ROOT)
+        with open(checkpoint, 'w') as file:
+            json.dump({'phase': 'originals', 'after': orphan_name}, file)
+        self.media_gc('--checkpoint', checkpoint)
+        self.assertTrue(os.path.isfile(self.orphan_path))
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_thumbnails_of_missing_sources(self):
+        """Миниатюры исчезнувших исходников тоже удаляются."""
+        os.remove(self.orphan_path)
+        self.media_gc()
+        self.assertFalse(self.thumbnail_exists(self.orphan_thumbnail))
+        self.assertTrue(self.thumbnail_exists(self.kept_thumbnail))
@@ -0,0 +1,171 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from core.metrics import registry
+from core.middleware.metrics import MetricsMiddleware
+from posts.models import Comment, Post
+from posts.views import post_detail
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(
+            username='TestStaff', is_staff=True
+        )
+        cls.user = User.objects.create_user(username='TestUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.user)
+
+    def test_metrics_available_only_for_staff(self):
+        """Метрики доступны только сотрудникам."""
+        response = self.authorized_user.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+        response = self.staff_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_by_view_name_and_cache(self):
+        """Запросы, время ответа и обращения к кэшу учитываются
+           по имени view.
+        """
+        self.authorized_user.get(reverse('posts:index'))
+        self.authorized_user.get(reverse('posts:index'))
+        content = self.staff_client.get(reverse('metrics')).content.decode()
+        for line in (
+            '# TYPE yatube_http_request_duration_seconds histogram',
+            'yatube_http_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"}',
+            'yatube_db_queries_per_request_count{view="posts:index"}',
+            'yatube_page_cache_requests_total'
+            '{result="hit",view="posts:index"}',
+            'yatube_page_cache_requests_total'
+            '{result="miss",view="posts:index"}',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, content)
+
+    def write_worker(self, name, view, value):
+        labels = [['method', 'GET'], ['status', '200'], ['view', view]]
+        path = os.path.join(TEMP_METRICS_DIR, name)
+        with open(path, 'w', encoding='utf-8') as metrics_file:
+            json.dump({
+                'counters': [['yatube_http_requests_total', labels, value]],
+                'histograms': [],
+            }, metrics_file)
+        return path
+
+    def requests_line(self, view, value):
+        return ('yatube_http_requests_total'
+                f'{{method="GET",status="200",view="{view}"}} {value}')
+
+    def test_metrics_merged_across_workers(self):
+        """Счетчики воркеров других хостов из общего каталога
+           суммируются и не считаются завершившимися.
+        """
+        paths = [
+            self.write_worker(f'metrics-other-host-{pid}-1.json', 'worker', 3)
+            for pid in (1, 2)
+        ]
+        content = self.staff_client.get(reverse('metrics')).content.decode()
+        self.assertIn(self.requests_line('worker', 6), content)
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+    def test_dead_workers_kept_in_total(self):
+        """Счетчики завершившегося воркера и воркера, чей pid занял
+           другой процесс, переносятся в общий файл и не пропадают.
+        """
+        worker = subprocess.Popen([sys.executable, '-c', ''])
+        worker.wait()
+        host = socket.gethostname()
+        paths = [
+            self.write_worker(
+                f'metrics-{host}-{worker.pid}-1.json', 'dead', 2
+            ),
+            self.write_worker(
+                f'metrics-{host}-{os.getpid()}-1.json', 'dead', 3
+            ),
+        ]
+        for _ in range(2):
+            content = self.staff_client.get(
+                reverse('metrics')
+            ).content.decode()
+            self.assertIn(self.requests_line('dead', 5), content)
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertTrue(os.path.exists(
+            os.path.join(TEMP_METRICS_DIR, registry.file_name)
+        ))
+
+    def test_concurrent_flushes(self):
+        """Потоки одного процесса сохраняют снимок без ошибок."""
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(50):
+                    registry.flush(force=True)
+            except OSError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=flush) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_streamed_page_recorded_when_finished(self):
+        """Потоковая страница учитывается после последнего куска вместе
+           с запросами, которые выполнили шаблоны.
+        """
+        post = Post.objects.create(author=self.user, text='Текст')
+        Comment.objects.create(post=post, author=self.user, text='Отзыв')
+        address = reverse('posts:post_detail', args=(post.pk,))
+        request = RequestFactory().get(address)
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(address)
+        key = (
+            'yatube_db_queries_per_request', (('view', 'posts:post_detail'),)
+        )
+        before = dict(registry.histograms.get(key, {'count': 0, 'sum': 0}))
+        response = MetricsMiddleware(
+            lambda request: post_detail(request, post.pk)
+        )(request)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            registry.histograms.get(key, {'count': 0})['count'],
+            before['count']
+        )
+        self.assertIn('Отзыв'.encode(), b''.join(response.streaming_content))
+        histogram = registry.histograms[key]
+        self.assertEqual(histogram['count'], before['count'] + 1)
+        # Пост в view и комментарии с авторами в шаблоне.
+        self.assertGreaterEqual(histogram['sum'] - before['sum'], 2)
@@ -0,0 +1,79 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import send_mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import OutboxMessage
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxEmailBackend',
+    OUTBOX_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_MAX_ATTEMPTS=2,
+)
+class OutboxTests(TestCase):
+    def send(self, subject='Сброс пароля'):
+        send_mail(
+            subject, 'Ссылка для сброса', 'from@yatube.ru', ['to@yatube.ru']
+        )
+
+    def send_outbox(self):
+        call_command('send_outbox', stdout=StringIO(), stderr=StringIO())
+
+    def test_send_mail_is_queued(self):
+        """Письмо сохраняется в очередь, а не отправляется сразу."""
+        self.send()
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.PENDING)
+        self.assertEqual(message.recipient_list(), ['to@yatube.ru'])
+
+    def test_delivery(self):
+        """Команда доставляет письма без изменений."""
+        self.send()
+        self.send('Второе письмо')
+        self.send_outbox()
+        self.assertEqual(len(mail.outbox), 2)
+        stored = OutboxMessage.objects.first()
+        self.assertEqual(
+            mail.outbox[0].message().as_bytes(), bytes(stored.message)
+        )
+        self.assertFalse(
+            OutboxMessage.objects.exclude(status=OutboxMessage.SENT).exists()
+        )
+
+    def test_retry_and_dead_letter(self):
+        """Ошибка откладывает письмо, а после лимита попыток — хоронит."""
+        self.send()
+        target = 'django.core.mail.backends.locmem.EmailBackend.send_messages'
+        with mock.patch(target, side_effect=OSError('down')):
+            self.send_outbox()
+            message = OutboxMessage.objects.get()
+            self.assertEqual(message.status, OutboxMessage.PENDING)
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.next_attempt_at, timezone.now())
+            self.send_outbox()
+            self.assertEqual(OutboxMessage.objects.get().attempts, 1)
+            OutboxMessage.objects.update(next_attempt_at=timezone.now())
+            self.send_outbox()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.DEAD)
+        self.assertIn('down', message.last_error)
+        self.send_outbox()
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_password_reset_returns_before_delivery(self):
+        """Сброс пароля только ставит письмо в очередь."""
+        User.objects.create_user(
+            username='user', email='to@yatube.ru', password='pass'
+        )
+        self.client.post('/auth/password_reset/', {'email': 'to@yatube.ru'})
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
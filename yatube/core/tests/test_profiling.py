@@ -0,0 +1,117 @@
+import glob
+import json
+import os
+import pstats
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from core.middleware.profiling import ProfilingMiddleware, make_profiling_token
+from posts.models import Post
+from posts.views import post_detail
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_DIR=TEMP_PROFILING_DIR)
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(
+            username='TestStaff', is_staff=True
+        )
+        cls.user = User.objects.create_user(username='TestUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.user)
+
+    def captures(self):
+        return glob.glob(os.path.join(TEMP_PROFILING_DIR, '*.prof'))
+
+    def test_staff_with_token_captures_profile(self):
+        """Запрос сотрудника с токеном сохраняет профиль и метаданные,
+           в том числе для class-based views.
+        """
+        addresses = {
+            reverse('posts:index'): 'posts:index',
+            reverse('users:signup'): 'users:signup',
+        }
+        for address, view_name in addresses.items():
+            with self.subTest(address=address):
+                shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+                response = self.staff_client.get(
+                    address, HTTP_X_YATUBE_PROFILE=make_profiling_token()
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(self.captures()), 1)
+                meta_path = self.captures()[0][:-len('.prof')] + '.json'
+                with open(meta_path, encoding='utf-8') as meta_file:
+                    meta = json.load(meta_file)
+                self.assertEqual(meta['path'], address)
+                self.assertEqual(meta['view_name'], view_name)
+
+    def test_streaming_view_profiled_with_templates(self):
+        """Потоковая страница поста профилируется вместе с рендерингом
+           шаблонов.
+        """
+        post = Post.objects.create(author=self.user, text='Текст поста')
+        address = reverse('posts:post_detail', args=(post.pk,))
+        request = RequestFactory().get(
+            address, HTTP_X_YATUBE_PROFILE=make_profiling_token()
+        )
+        request.user = self.staff
+        request.resolver_match = resolve(address)
+        middleware = ProfilingMiddleware(lambda request: None)
+        response = middleware.process_view(
+            request, post_detail, (), {'post_id': post.pk}
+        )
+        self.assertFalse(response.streaming)
+        self.assertIn('Текст поста'.encode(), response.content)
+        self.assertEqual(len(self.captures()), 1)
+        stats = pstats.Stats(self.captures()[0]).stats
+        self.assertTrue(any(
+            filename.endswith(os.path.join('template', 'base.py'))
+            and function == 'render'
+            for filename, _, function in stats
+        ))
+
+    def test_profiling_requires_staff_and_valid_token(self):
+        """Без прав сотрудника или с неверным токеном профиль
+           не сохраняется.
+        """
+        address = reverse('posts:index')
+        self.authorized_user.get(
+            address, {'_profile': make_profiling_token()}
+        )
+        self.staff_client.get(address, {'_profile': 'profile:bad:token'})
+        self.assertEqual(self.captures(), [])
+
+    def test_profiles_command_summarizes_captures(self):
+        """Команда profiles выводит список профилей и сводку функций."""
+        self.staff_client.get(
+            reverse('posts:index'), {'_profile': make_profiling_token()}
+        )
+        out = StringIO()
+        call_command('profiles', '--limit', '5', stdout=out)
+        self.assertIn('posts:index', out.getvalue())
+        self.assertIn('function calls', out.getvalue())
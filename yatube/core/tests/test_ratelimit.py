@@ -0,0 +1,156 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+
+from core.ratelimit import check_ratelimit, parse_rate, ratelimit
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlidingWindowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, user=None, address='10.0.0.1'):
+        request = self.factory.post('/', REMOTE_ADDR=address)
+        if user is not None:
+            request.user = user
+        return request
+
+    def test_parse_rate(self):
+        """Лимит задается как количество за период."""
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('5/h'), (5, 3600))
+
+    def test_window_slides(self):
+        """Предыдущее окно учитывается с убывающим весом, так что
+        на границе окон лимит не удваивается.
+        """
+        def check(now):
+            return check_ratelimit(self.request(self.user), 's', '2/m',
+                                   now=now)
+
+        self.assertEqual([check(100), check(100)], [0, 0])
+        self.assertEqual(check(100), 50)
+        self.assertEqual(check(120), 30)
+        self.assertEqual(check(150), 0)
+        self.assertEqual(check(150), 30)
+
+    def test_user_bucket_ignores_session(self):
+        """Корзина пользователя не зависит от cookie сессии, а адрес
+        получает свой, больший лимит.
+        """
+        check_ratelimit(self.request(self.user), 's', '1/m', '5/m', now=0)
+        request = self.request(self.user, address='10.0.0.2')
+        request.COOKIES['sessionid'] = 'fresh'
+        self.assertEqual(check_ratelimit(request, 's', '1/m', now=0), 120)
+        for _ in range(4):
+            self.assertEqual(
+                check_ratelimit(self.request(), 's', '1/m', '5/m', now=0), 0
+            )
+        self.assertEqual(
+            check_ratelimit(self.request(), 's', '1/m', '5/m', now=0), 72
+        )
+
+    def test_rejected_request_not_debited(self):
+        """Отказ по корзине адреса не читает пользователя и не списывает
+        запрос с его корзины.
+        """
+        for _ in range(2):
+            check_ratelimit(self.request(), 's', '1/m', '2/m', now=0)
+        request = self.request()
+        request.user = SimpleLazyObject(self.fail)
+        self.assertEqual(
+            check_ratelimit(request, 's', '1/m', '2/m', now=0), 90
+        )
+        other = self.request(self.user, address='10.0.0.2')
+        self.assertEqual(check_ratelimit(other, 's', '1/m', '2/m', now=0), 0)
+
+    def test_decorator(self):
+        """Декоратор ограничивает только указанные методы."""
+        @ratelimit('1/m', methods=('POST',), scope='test', ip_rate='1/m')
+        def view(request):
+            return HttpResponse()
+
+        factory = RequestFactory()
+        self.assertEqual(view(factory.post('/')).status_code, 200)
+        self.assertEqual(view(factory.get('/')).status_code, 200)
+        response = view(factory.post('/'))
+        self.assertEqual(response.status_code, 429)
+        self.assertLessEqual(int(response['Retry-After']), 120)
+
+
+@override_settings(RATELIMITS={
+    'posts:post_create': {
+        'rate': '2/m', 'ip_rate': '3/m', 'methods': ('POST',),
+    },
+})
+class RateLimitMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_endpoint_limited(self):
+        """Лишние записи получают 429, не доходя до view."""
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            response = self.client.post(url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(any(
+            'INSERT' in query['sql'] for query in queries.captured_queries
+        ))
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_new_session_does_not_bypass(self):
+        """Новая сессия того же пользователя не обходит лимит."""
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            self.client.post(url, {'text': 'Пост'})
+        other = Client()
+        other.force_login(self.user)
+        self.assertEqual(other.post(url, {'text': 'Пост'}).status_code, 429)
+
+    def test_ip_bucket_shared_by_users(self):
+        """Пользователи за одним адресом делят больший лимит адреса."""
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            self.client.post(url, {'text': 'Пост'})
+        other = Client()
+        other.force_login(User.objects.create_user(username='neighbour'))
+        self.assertEqual(other.post(url, {'text': 'Пост'}).status_code, 302)
+        self.assertEqual(other.post(url, {'text': 'Пост'}).status_code, 429)
+
+    def test_ip_rejection_without_queries(self):
+        """Отказ по корзине адреса не загружает сессию и пользователя."""
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            Client().post(url, {'text': 'Пост'})
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
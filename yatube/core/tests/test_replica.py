@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware.replica import PIN_COOKIE
+from core.routers import ReplicaRouter, use_replica
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.addCleanup(use_replica, False)
+
+    def test_reads_go_to_replica_until_first_write(self):
+        """Чтение идет в реплику, пока в запросе не было записи."""
+        use_replica(True)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_go_to_primary_by_default(self):
+        """Без разрешения middleware чтение идет в основную базу."""
+        use_replica(False)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+class ReplicaMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.user = User.objects.create_user(username='TestUser')
+
+    def setUp(self):
+        self.authorized_user = Client()
+        self.authorized_user.force_login(self.user)
+
+    def test_write_pins_user_to_primary(self):
+        """После записи ставится cookie привязки к основной базе,
+           чтение без записи ее не ставит.
+        """
+        response = self.authorized_user.get(reverse('posts:index'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = self.authorized_user.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+        self.assertIn(PIN_COOKIE, response.cookies)
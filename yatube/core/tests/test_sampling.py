@@ -0,0 +1,55 @@
+import os
+import shutil
+import sys
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.sampling import SamplingProfiler, read_folded
+
+TEMP_SAMPLES_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class SamplingProfilerTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SAMPLES_DIR, ignore_errors=True)
+
+    def test_samples_are_flushed_as_folded_stacks(self):
+        """Сэмплы сворачиваются в стеки от корня к листу
+           и сбрасываются в отдельный файл воркера.
+        """
+        profiler = SamplingProfiler(tempfile.mkdtemp(dir=TEMP_SAMPLES_DIR))
+        for _ in range(3):
+            profiler.sample(sys._getframe())
+        path = profiler.flush()
+        stacks = dict(read_folded(path))
+        self.assertEqual(sum(stacks.values()), 3)
+        leaf = next(iter(stacks)).split(';')[-1]
+        self.assertTrue(leaf.startswith(
+            'test_samples_are_flushed_as_folded_stacks'
+        ))
+        self.assertIsNone(profiler.flush())
+
+    def test_rotation_and_merge(self):
+        """Старые файлы воркера удаляются, оставшиеся объединяются
+           командой merge_samples.
+        """
+        output_dir = tempfile.mkdtemp(dir=TEMP_SAMPLES_DIR)
+        profiler = SamplingProfiler(output_dir, max_files=2)
+        for _ in range(3):
+            profiler.sample(sys._getframe())
+            profiler.flush()
+        paths = [
+            os.path.join(output_dir, name)
+            for name in os.listdir(output_dir)
+        ]
+        self.assertEqual(len(paths), 2)
+        output = os.path.join(TEMP_SAMPLES_DIR, 'merged.txt')
+        call_command('merge_samples', *paths, output=output,
+                     stdout=StringIO())
+        self.assertEqual(sum(dict(read_folded(output)).values()), 2)
@@ -0,0 +1,74 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.views import serve_static
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE_DIR = os.path.join(TEMP_DIR, 'static')
+STATIC_ROOT = os.path.join(TEMP_DIR, 'collected_static')
+CSS = 'body { color: black; }\n' * 50
+
+
+@override_settings(
+    STATICFILES_DIRS=(SOURCE_DIR,),
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, 'css'))
+        with open(os.path.join(SOURCE_DIR, 'css', 'site.css'), 'w') as css:
+            css.write(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     stdout=StringIO())
+        self.hashed_name = staticfiles_storage.stored_name('css/site.css')
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """collectstatic сохраняет файл с хешем и его сжатую копию."""
+        self.assertRegex(self.hashed_name, r'^css/site\.[0-9a-f]{12}\.css$')
+        gz_path = os.path.join(STATIC_ROOT, self.hashed_name + '.gz')
+        with open(gz_path, 'rb') as gz_file:
+            self.assertEqual(gzip.decompress(gz_file.read()).decode(), CSS)
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        """Хешированный файл отдается сжатым с вечным кэшированием,
+           файл без хеша — с обязательной перепроверкой.
+        """
+        request = RequestFactory().get(
+            '/static/', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        response = serve_static(request, self.hashed_name)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        response.close()
+        response = serve_static(RequestFactory().get('/static/'),
+                                'css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_missing_manifest_entry_falls_back_to_name(self):
+        """Файл вне манифеста не ломает тег static."""
+        self.assertEqual(
+            staticfiles_storage.stored_name('css/missing.css'),
+            'css/missing.css'
+        )
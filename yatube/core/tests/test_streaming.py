@@ -0,0 +1,142 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.shortcuts import render
+from django.template import Context, Engine
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import cached_response
+from core.middleware.compression import CompressionMiddleware
+from core.streaming import chunked, render_streaming, stream_template
+from posts.models import Comment, Post
+from posts.views import post_detail
+
+User = get_user_model()
+
+TEMPLATES = {
+    'base.html': (
+        '<head>{% block title %}Сайт{% endblock %}</head>'
+        '{% block content %}{% endblock %}<footer></footer>'
+    ),
+    'section.html': (
+        '{% extends "base.html" %}'
+        '{% block content %}<nav></nav>{% block inner %}{% endblock %}'
+        '{% endblock %}'
+    ),
+    'page.html': (
+        '{% extends "section.html" %}'
+        '{% block title %}{{ block.super }}: {{ name }}{% endblock %}'
+        '{% block inner %}{% for item in items %}{{ item }}{% endfor %}'
+        '{% endblock %}'
+    ),
+}
+
+
+class StreamTemplateTests(TestCase):
+    def setUp(self):
+        self.engine = Engine(loaders=[
+            ('django.template.loaders.locmem.Loader', TEMPLATES),
+        ])
+
+    def test_same_output_as_render(self):
+        """Поток совпадает с обычным рендерингом, включая block.super
+        и несколько уровней наследования.
+        """
+        template = self.engine.get_template('page.html')
+        data = {'name': 'страница', 'items': range(5)}
+        streamed = ''.join(
+            part for part in stream_template(template, Context(data))
+            if isinstance(part, str)
+        )
+        self.assertEqual(streamed, template.render(Context(data)))
+
+    def test_chunks_split_on_blocks(self):
+        template = self.engine.get_template('page.html')
+        chunks = list(chunked(
+            stream_template(template, Context({'name': 'x', 'items': []})),
+            4096
+        ))
+        self.assertEqual(chunks[0], '<head>')
+        self.assertEqual(chunks[-1], '<footer></footer>')
+
+    def test_chunk_size(self):
+        parts = ['a' * 10] * 10
+        self.assertEqual(
+            list(chunked(parts, 30)), ['a' * 30, 'a' * 30, 'a' * 30, 'a' * 10]
+        )
+
+
+class RenderStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='writer')
+        cls.post = Post.objects.create(author=cls.author, text='Текст поста')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Отзыв {number}')
+            for number in range(50)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def get_request(self, **extra):
+        request = self.factory.get(
+            reverse('posts:post_detail', args=(self.post.pk,)), **extra
+        )
+        request.user = AnonymousUser()
+        return request
+
+    def test_post_detail_streams(self):
+        """Шапка уходит до контента, а страница совпадает с обычной.
+
+        Запрос строится через RequestFactory: тестовый клиент слушает
+        ``template_rendered``, и через него поток не включается.
+        """
+        request = self.get_request()
+        response = post_detail(request, self.post.pk)
+        self.assertTrue(response.streaming)
+        self.assertIn('Cookie', response['Vary'])
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+        self.assertNotIn('Отзыв'.encode(), chunks[0])
+        expected = render(self.get_request(), 'posts/post_detail.html', {
+            'post': self.post,
+            'comments': self.post.comments.all(),
+        })
+        self.assertEqual(b''.join(chunks), expected.content)
+
+    def test_compressed_stream(self):
+        request = self.get_request(HTTP_ACCEPT_ENCODING='gzip')
+        middleware = CompressionMiddleware(
+            lambda request: post_detail(request, self.post.pk)
+        )
+        response = middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        html = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn('Отзыв 49'.encode(), html)
+
+    def test_full_render_fallbacks(self):
+        """Ответ рендерится целиком, если тело нужно полностью."""
+        with override_settings(STREAMING_RENDER_ENABLED=False):
+            response = post_detail(self.get_request(), self.post.pk)
+            self.assertFalse(response.streaming)
+        request = self.get_request()
+        response = cached_response(
+            request, 'streaming-test',
+            lambda: render_streaming(request, 'posts/post_detail.html', {
+                'post': self.post,
+                'comments': self.post.comments.all(),
+            }),
+            60
+        )
+        self.assertFalse(response.streaming)
+        self.assertIsNotNone(cache.get('streaming-test'))
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.context['post'], self.post)
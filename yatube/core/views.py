@@ -1,6 +1,28 @@
+import mimetypes
+import os
+import re
 from http import HTTPStatus
 
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag, urlquote
+
+from .http import accepted_encodings, iter_file_range, parse_range
+from .metrics import load_snapshots, render_prometheus
+from .storage import compressed_variants
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
 
 
 def page_not_found(request, exception):
@@ -34,3 +56,130 @@ def server_error(request):
         'core/500.html',
         status=HTTPStatus.INTERNAL_SERVER_ERROR
     )
+
+
+def metrics(request):
+    """Метрики всех воркеров в текстовом формате Prometheus."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(
+        render_prometheus(load_snapshots()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def serve_static(request, path):
+    """Отдает собранную статику без фронтового прокси.
+
+    Предпочитает заранее сжатые ``.br`` и ``.gz`` копии, если клиент
+    их принимает. Файлы с хешем в имени кэшируются навсегда,
+    остальные браузер перепроверяет при каждом обращении.
+    """
+    full_path = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404
+    content_type, _ = mimetypes.guess_type(full_path)
+    serve_path, content_encoding = full_path, None
+    accepted = accepted_encodings(request)
+    for encoding, suffix in compressed_variants():
+        if encoding in accepted and os.path.isfile(full_path + suffix):
+            serve_path, content_encoding = full_path + suffix, encoding
+            break
+    response = FileResponse(open(serve_path, 'rb'))
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME_RE.search(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    return response
+
+
+def media_path(path):
+    """Полный путь к публичному медиафайлу или Http404."""
+    if (not path.startswith(settings.MEDIA_PUBLIC_PREFIXES)
+            or any(part.startswith('.') for part in path.split('/'))):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def serve_media(request, path):
+    """Отдает картинки постов и миниатюры.
+
+    Доступны только файлы из ``MEDIA_PUBLIC_PREFIXES``. Если задан
+    ``MEDIA_ACCEL``, сам файл отдает фронтовый прокси по заголовку
+    X-Accel-Redirect (nginx) или X-Sendfile (Apache, lighttpd).
+    Иначе файл отдается из Python с ETag, Last-Modified и Range,
+    а целиком — через FileResponse, который сервер может передать
+    через sendfile без копирования.
+    """
+    full_path = media_path(path)
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + urlquote(path)
+        )
+        return response
+    if settings.MEDIA_ACCEL == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+
+    stat = os.stat(full_path)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = media_range_response(request, full_path, etag, stat)
+    if response is None:
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type
+        )
+    response['Content-Type'] = content_type
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = (
+        f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+    )
+    return response
+
+
+def media_range_response(request, full_path, etag, stat):
+    range_header = request.META.get('HTTP_RANGE')
+    if not range_header or request.method not in ('GET', 'HEAD'):
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag:
+        return None
+    try:
+        byte_range = parse_range(range_header, stat.st_size)
+    except ValueError:
+        response = HttpResponse(
+            status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if byte_range is None:
+        return None
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        iter_file_range(full_path, start, length),
+        status=HTTPStatus.PARTIAL_CONTENT,
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Content-Length'] = str(length)
+    return response
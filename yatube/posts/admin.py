@@ -12,10 +12,19 @@ class PostAdmin(admin.ModelAdmin):
         'group'
     )
     list_editable = ('group',)
+    readonly_fields = ('views',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def save_model(self, request, obj, form, change):
+        if change:
+            # Просмотры, записанные буфером после загрузки формы,
+            # не должны затираться.
+            obj.save(update_fields=form.changed_data)
+        else:
+            obj.save()
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'description')
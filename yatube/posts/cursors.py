@@ -0,0 +1,40 @@
+import datetime
+
+from django.db.models import Q
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def encode_cursor(post):
+    """Курсор — время публикации в микросекундах и id поста."""
+    return '{}.{}'.format((post.pub_date - EPOCH) // MICROSECOND, post.pk)
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор, на неверном значении бросает ValueError."""
+    micros, _, pk = cursor.partition('.')
+    try:
+        return EPOCH + int(micros) * MICROSECOND, int(pk)
+    except OverflowError:
+        raise ValueError(f'Неверный курсор: {cursor}')
+
+
+def page_after(posts, cursor, size):
+    """Возвращает ``size`` постов после курсора и курсор следующей
+    порции (``None``, если постов больше нет).
+
+    Выборка идет по ключу (pub_date, id), а не через OFFSET, поэтому
+    глубокие порции стоят столько же, сколько первая, а новые посты
+    не сдвигают уже показанные.
+    """
+    posts = posts.order_by('-pub_date', '-id')
+    if cursor:
+        pub_date, pk = decode_cursor(cursor)
+        posts = posts.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+    page = list(posts[:size + 1])
+    if len(page) <= size:
+        return page, None
+    return page[:size], encode_cursor(page[size - 1])
@@ -0,0 +1,200 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.utils.text import Truncator
+
+from core.cache import get_or_rebuild, shared_timeout
+
+from . import negative_cache
+from .cursors import page_after
+from .models import Group, Post, User
+
+SITE = 'site'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def version_key(scope):
+    return f'feed_version:{scope}'
+
+
+def get_version(scope):
+    version = cache.get(version_key(scope))
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key(scope), version, None):
+            version = cache.get(version_key(scope), version)
+    return version
+
+
+def invalidate(*scopes):
+    """Делает недействительными сохраненные ленты: их ключи строятся
+    по версии, а старые копии доживают свой срок в кэше.
+    """
+    cache.set_many(
+        {version_key(scope): uuid.uuid4().hex for scope in scopes}, None
+    )
+
+
+class LatestPostsFeed(Feed):
+    """Последние записи сайта.
+
+    Берет те же посты и в том же порядке (pub_date, id), что и ленты
+    на страницах.
+    """
+
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов Yatube.'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        posts, _ = page_after(
+            self.posts(obj).select_related('author', 'group'),
+            None,
+            settings.FEED_ITEMS,
+        )
+        return posts
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(60)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return (item.group.title,) if item.group else ()
+
+
+class GroupFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        negative_cache.check(negative_cache.GROUPS, slug)
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_posts', args=(group.slug,))
+
+    def posts(self, group):
+        return group.group_posts.all()
+
+
+class AuthorFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        negative_cache.check(negative_cache.USERS, username)
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}.'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def posts(self, author):
+        return author.posts.all()
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+    subtitle = GroupFeed.description
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+    subtitle = AuthorFeed.description
+
+
+def render_feed(feed, request, kwargs):
+    response = feed(request, **kwargs)
+    content = response.content
+    return (
+        content,
+        response['Content-Type'],
+        quote_etag(hashlib.md5(content).hexdigest()),
+        parse_http_date_safe(response.get('Last-Modified', '')),
+    )
+
+
+def cached_feed(feed_class, scope):
+    """View ленты из кэша с ETag и Last-Modified.
+
+    Готовая лента хранится под ключом с версией ``scope``, которую
+    сбрасывают сигналы при изменении постов, групп и авторов, поэтому
+    опрос без изменений не трогает базу и обычно получает 304. Если кэш
+    не общий, сброс из другого процесса не виден, и копия живет
+    не дольше ``LOCAL_CACHE_TIMEOUT``.
+    """
+    feed = feed_class()
+
+    def view(request, **kwargs):
+        feed_scope = scope(**kwargs)
+        key = 'feed:{}:{}:{}:{}://{}'.format(
+            feed_scope, get_version(feed_scope), feed_class.__name__,
+            request.scheme, request.get_host()
+        )
+        content, content_type, etag, last_modified = get_or_rebuild(
+            key,
+            lambda: render_feed(feed, request, kwargs),
+            shared_timeout(settings.FEED_CACHE_TIMEOUT),
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        return response
+    return view
+
+
+latest_rss = cached_feed(LatestPostsFeed, lambda: SITE)
+latest_atom = cached_feed(LatestPostsAtomFeed, lambda: SITE)
+group_rss = cached_feed(GroupFeed, group_scope)
+group_atom = cached_feed(GroupAtomFeed, group_scope)
+author_rss = cached_feed(AuthorFeed, author_scope)
+author_atom = cached_feed(AuthorAtomFeed, author_scope)
@@ -0,0 +1,73 @@
+"""Кэш подписок: для каждого пользователя — отсортированный массив id
+авторов, на которых он подписан.
+
+Массив ``array('q')`` хранится в кэше байтами (8 байт на подписку),
+проверка подписки — бинарный поиск, а проверка целой страницы авторов
+обходится одним чтением из кэша. Массив собирается по основной базе:
+копия с отстающей реплики прожила бы в кэше весь срок. Сигналы
+сбрасывают массив во всех процессах, только если кэш общий; иначе
+он живет не дольше ``LOCAL_CACHE_TIMEOUT``.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import shared_timeout
+
+from .models import Follow
+
+
+def cache_key(user_id):
+    return f'follow_graph:following:{user_id}'
+
+
+def following_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    data = cache.get(cache_key(user_id))
+    ids = array('q')
+    if data is not None:
+        ids.frombytes(data)
+        return ids
+    ids.extend(
+        Follow.objects.using('default').filter(user_id=user_id)
+        .order_by('author_id')
+        .values_list('author_id', flat=True)
+    )
+    cache.set(
+        cache_key(user_id), ids.tobytes(),
+        shared_timeout(settings.FOLLOW_GRAPH_TIMEOUT)
+    )
+    return ids
+
+
+def contains(ids, author_id):
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def is_following(user, author):
+    if not user.is_authenticated:
+        return False
+    return contains(following_ids(user.pk), author.pk)
+
+
+def following_map(user, author_ids):
+    """``{author_id: подписан ли user}`` для всех авторов страницы."""
+    if not user.is_authenticated:
+        return dict.fromkeys(author_ids, False)
+    ids = following_ids(user.pk)
+    return {author_id: contains(ids, author_id) for author_id in author_ids}
+
+
+def invalidate(user_id):
+    """Сбрасывает подписки пользователя сейчас и после коммита.
+
+    Второй сброс убирает копию, которую другой процесс мог собрать
+    из еще не закоммиченных данных.
+    """
+    key = cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from posts.models import Follow, FollowChange, FollowSuggestion
+from posts.suggestions import load_following, np, rank_suggestions
+
+IN_CHUNK = 500
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации «кого почитать». По умолчанию '
+            'только для пользователей, чьи подписки изменились, и их '
+            'подписчиков; с --full — для всех.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+        parser.add_argument(
+            '--limit', type=int, default=settings.FOLLOW_SUGGESTIONS_STORED,
+            help='Сколько рекомендаций хранить на пользователя.'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        last_change = FollowChange.objects.aggregate(last=Max('pk'))['last']
+        following = load_following()
+        if options['full']:
+            user_ids = sorted(following)
+        else:
+            user_ids = self.affected_users(last_change)
+        batch = []
+        for result in rank_suggestions(following, user_ids, options['limit']):
+            batch.append(result)
+            if len(batch) >= options['batch_size']:
+                self.store(batch)
+                batch = []
+        self.store(batch)
+        if options['full']:
+            # Пользователи, которые отписались от всех, выпали из графа.
+            FollowSuggestion.objects.filter(
+                user__follower__isnull=True
+            ).delete()
+        if last_change is not None:
+            FollowChange.objects.filter(pk__lte=last_change).delete()
+        engine = 'NumPy' if np is not None else 'Python'
+        self.stdout.write(
+            f'Пересчитано пользователей: {len(user_ids)} ({engine})'
+        )
+
+    def affected_users(self, last_change):
+        """Изменившиеся пользователи и их подписчики: у подписчиков
+        меняются пути через изменившегося пользователя.
+        """
+        if last_change is None:
+            return []
+        changed = sorted(set(
+            FollowChange.objects.filter(pk__lte=last_change)
+            .values_list('user_id', flat=True)
+        ))
+        affected = set(changed)
+        for start in range(0, len(changed), IN_CHUNK):
+            affected.update(
+                Follow.objects.filter(
+                    author_id__in=changed[start:start + IN_CHUNK]
+                ).values_list('user_id', flat=True)
+            )
+        return sorted(affected)
+
+    def store(self, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(
+                user_id__in=[user_id for user_id, _ in batch]
+            ).delete()
+            FollowSuggestion.objects.bulk_create(
+                FollowSuggestion(
+                    user_id=user_id, author_id=author_id, score=score,
+                    rank=rank
+                )
+                for user_id, ranked in batch
+                for rank, (author_id, score) in enumerate(ranked, 1)
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import unique_viewers, view_counts
+
+
+class Command(BaseCommand):
+    help = ('Записывает накопленные в этом процессе просмотры постов '
+            'и скетчи уникальных читателей в базу.')
+
+    def handle(self, *args, **options):
+        views = view_counts.buffer.flush()
+        sketches = unique_viewers.buffer.flush()
+        self.stdout.write(
+            f'Записано просмотров: {views}, скетчей читателей: {sketches}'
+        )
@@ -0,0 +1,182 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import Post
+
+
+def walk_sorted(root, relative='', after=()):
+    """Обходит дерево файлов в порядке имен, не строя полный список.
+
+    Отдает пары ``(имя, DirEntry)`` для файлов, имя которых больше
+    ``after``; каталоги, целиком лежащие до ``after``, пропускаются
+    без чтения.
+    """
+    with os.scandir(os.path.join(root, relative)) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.name.startswith('.') or entry.name.endswith('.tmp'):
+            continue
+        name = f'{relative}/{entry.name}' if relative else entry.name
+        parts = tuple(name.split('/'))
+        if entry.is_dir(follow_symlinks=False):
+            if parts >= after[:len(parts)]:
+                yield from walk_sorted(root, name, after)
+        elif entry.is_file(follow_symlinks=False) and parts > after:
+            yield name, entry
+
+
+class Throttle:
+    """Ограничивает число операций удаления в секунду."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки постов, на которые больше не ссылается ни '
+            'один пост, вместе с их миниатюрами sorl-thumbnail, а также '
+            'миниатюры исчезнувших исходников. Прогресс сохраняется, '
+            'прерванный запуск продолжается с того же места.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--rate', type=float, default=50,
+            help='Не больше стольких удалений в секунду, 0 — без ограничения.'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=60 * 60,
+            help='Не трогать файлы моложе стольких секунд: пост с только '
+                 'что загруженной картинкой мог еще не сохраниться.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.MEDIA_ROOT, '.media_gc.json'),
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать обход заново, игнорируя сохраненный прогресс.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.dry_run = options['dry_run']
+        self.throttle = Throttle(options['rate'])
+        self.storage = Post._meta.get_field('image').storage
+        self.removed = {'originals': 0, 'thumbnails': 0}
+        state = {} if options['restart'] else self.load_checkpoint()
+        if state.get('phase', 'originals') == 'originals':
+            self.collect_originals(state.get('after', ''))
+        self.collect_thumbnails()
+        if not self.dry_run and os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        verb = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(
+            f'{verb} картинок: {self.removed["originals"]}, '
+            f'миниатюр: {self.removed["thumbnails"]}'
+        )
+
+    def load_checkpoint(self):
+        try:
+            with open(self.options['checkpoint'], encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_checkpoint(self, phase, after=''):
+        if self.dry_run:
+            return
+        path = self.options['checkpoint']
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'phase': phase, 'after': after}, file)
+        os.replace(tmp_path, path)
+
+    def collect_originals(self, after):
+        directory = Post._meta.get_field('image').upload_to.rstrip('/')
+        if not os.path.isdir(self.storage.path(directory)):
+            return
+        after = tuple(after.split('/')) if after else ()
+        deadline = time.time() - self.options['min_age']
+        batch = []
+        for name, entry in walk_sorted(self.storage.location, directory,
+                                       after):
+            batch.append((name, entry))
+            if len(batch) >= self.options['batch_size']:
+                self.collect_batch(batch, deadline)
+                batch = []
+        if batch:
+            self.collect_batch(batch, deadline)
+        self.save_checkpoint('thumbnails')
+
+    def collect_batch(self, batch, deadline):
+        referenced = set(
+            Post.objects.filter(image__in=[name for name, _ in batch])
+            .values_list('image', flat=True)
+        )
+        for name, entry in batch:
+            if name in referenced or entry.stat().st_mtime > deadline:
+                continue
+            self.throttle.wait()
+            if not self.still_orphaned(name, deadline):
+                continue
+            self.stdout.write(f'Картинка без поста: {name}')
+            self.delete_thumbnails(ImageFile(name, self.storage).key)
+            if not self.dry_run:
+                self.storage.delete(name)
+            self.removed['originals'] += 1
+        self.save_checkpoint('originals', batch[-1][0])
+
+    def still_orphaned(self, name, deadline):
+        """Повторная проверка прямо перед удалением.
+
+        Пока обходилась пачка, файл мог снова загрузить пользователь
+        (хранилище обновляет mtime) или на него мог сослаться новый пост.
+        """
+        try:
+            if os.stat(self.storage.path(name)).st_mtime > deadline:
+                return False
+        except FileNotFoundError:
+            return False
+        return not Post.objects.filter(image=name).exists()
+
+    def delete_thumbnails(self, source_key):
+        """Удаляет файлы миниатюр исходника и его записи в kvstore."""
+        kvstore = default.kvstore
+        for key in kvstore._get(source_key, identity='thumbnails') or []:
+            thumbnail = kvstore._get(key)
+            if thumbnail is None:
+                continue
+            self.stdout.write(f'Миниатюра: {thumbnail.name}')
+            self.removed['thumbnails'] += 1
+            self.throttle.wait()
+            if not self.dry_run:
+                kvstore._delete(key)
+                thumbnail.delete()
+        if not self.dry_run:
+            kvstore._delete(source_key, identity='thumbnails')
+            kvstore._delete(source_key)
+
+    def collect_thumbnails(self):
+        """Миниатюры исходников, которых уже нет в хранилище."""
+        kvstore = default.kvstore
+        for key in list(kvstore._find_keys(identity='thumbnails')):
+            source = kvstore._get(key)
+            if source is None or not source.exists():
+                self.delete_thumbnails(key)
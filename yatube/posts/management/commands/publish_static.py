@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from posts.models import StaleSnapshot
+from posts.snapshots import all_targets, publish
+
+
+class Command(BaseCommand):
+    help = ('Публикует статические снимки анонимных страниц в '
+            'STATIC_SNAPSHOT_ROOT, чтобы прокси отдавал их с диска. '
+            'По умолчанию — только страницы из очереди изменений; '
+            'с --all — все.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Опубликовать главную, все группы, профили и посты.'
+        )
+
+    def handle(self, *args, **options):
+        root = settings.STATIC_SNAPSHOT_ROOT
+        if not root:
+            raise CommandError('Не задан STATIC_SNAPSHOT_ROOT.')
+        last_change = StaleSnapshot.objects.aggregate(
+            last=Max('pk')
+        )['last']
+        if options['all']:
+            targets = all_targets()
+        else:
+            targets = self.stale_targets(last_change)
+        pages = files = 0
+        for kind, key in targets:
+            try:
+                files += publish(root, kind, key)
+            except SuspiciousFileOperation as error:
+                self.stderr.write(f'Пропущено {kind} {key}: {error}')
+                continue
+            pages += 1
+        if last_change is not None:
+            StaleSnapshot.objects.filter(pk__lte=last_change).delete()
+        self.stdout.write(f'Опубликовано страниц: {pages}, файлов: {files}')
+
+    def stale_targets(self, last_change):
+        if last_change is None:
+            return []
+        return sorted(set(
+            StaleSnapshot.objects.filter(pk__lte=last_change)
+            .values_list('kind', 'key')
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import negative_cache
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает фильтры Блума по именам пользователей, slug '
+            'групп и id постов, по которым view отдают 404 без запроса '
+            'к базе. Запускается периодически.')
+
+    def handle(self, *args, **options):
+        busy = []
+        for kind in negative_cache.SOURCES:
+            count = negative_cache.rebuild(kind)
+            if count is None:
+                busy.append(kind)
+                continue
+            self.stdout.write(f'{kind}: ключей {count}')
+        if busy:
+            raise CommandError(
+                'Фильтры заняты другим процессом: {}'.format(', '.join(busy))
+            )
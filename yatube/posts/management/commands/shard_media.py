@@ -0,0 +1,61 @@
+import re
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+SHARDED_NAME_RE = re.compile(r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}')
+
+
+class Command(BaseCommand):
+    help = ('Переносит картинки постов из плоского каталога posts/ '
+            'в хранилище с именами по хешу содержимого. Старые файлы '
+            'не удаляются, поэтому закэшированные страницы продолжают '
+            'работать; их потом убирает сборка мусора медиа.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет перенесено.'
+        )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        moved = deduplicated = missing = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .exclude(image='')
+                .order_by('pk')
+                .values_list('pk', 'image')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for pk, old_name in batch:
+                if SHARDED_NAME_RE.match(old_name):
+                    continue
+                if not storage.exists(old_name):
+                    missing += 1
+                    self.stderr.write(f'Нет файла {old_name} (пост {pk})')
+                    continue
+                with storage.open(old_name) as content:
+                    new_name = storage.content_name(old_name, content)
+                    if storage.exists(new_name):
+                        deduplicated += 1
+                    elif not options['dry_run']:
+                        storage.save(old_name, content)
+                self.stdout.write(f'{old_name} -> {new_name}')
+                if options['dry_run']:
+                    continue
+                # Условие на старое имя не даст затереть картинку, которую
+                # автор успел заменить, пока шел перенос.
+                moved += Post.objects.filter(
+                    pk=pk, image=old_name
+                ).update(image=new_name)
+        self.stdout.write(
+            f'Перенесено: {moved}, совпало с уже сохраненными: '
+            f'{deduplicated}, отсутствует: {missing}'
+        )
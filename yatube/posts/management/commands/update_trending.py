@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = ('Удаляет устаревшие счетчики активности и пересчитывает '
+            'популярные посты и группы. Запускать раз в несколько минут.')
+
+    def handle(self, *args, **options):
+        top = compute_trending(prune=True)
+        self.stdout.write(
+            f'Постов: {len(top["post"])}, групп: {len(top["group"])}'
+        )
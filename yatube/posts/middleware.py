@@ -0,0 +1,40 @@
+from django.conf import settings
+
+from . import unique_viewers, view_counts
+from .models import UniqueViewSketch
+
+
+class ViewTrackingMiddleware:
+    """Считает просмотры постов и уникальных читателей постов
+    и профилей.
+
+    Стоит перед AnonymousFastPathMiddleware, чтобы учитывать и страницы,
+    отданные из кэша: на попадании быстрый путь тоже заполняет
+    ``request.resolver_match``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if (request.method != 'GET' or response.status_code != 200
+                or match is None):
+            return response
+        if match.view_name == 'posts:post_detail':
+            post_id = match.kwargs['post_id']
+            if settings.VIEW_COUNTS_ENABLED:
+                view_counts.buffer.add(post_id)
+            if settings.UNIQUE_VIEWERS_ENABLED:
+                unique_viewers.buffer.add(
+                    UniqueViewSketch.POST, post_id,
+                    unique_viewers.visitor_id(request)
+                )
+        elif (match.view_name == 'posts:profile'
+                and settings.UNIQUE_VIEWERS_ENABLED):
+            unique_viewers.buffer.add(
+                UniqueViewSketch.PROFILE, match.kwargs['username'],
+                unique_viewers.visitor_id(request)
+            )
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа')], max_length=8)),
+                ('object_id', models.PositiveIntegerField()),
+                ('hour', models.PositiveIntegerField(verbose_name='Час от начала эпохи')),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='engagementcounter',
+            index=models.Index(fields=['hour'], name='engagement_hour'),
+        ),
+        migrations.AddConstraint(
+            model_name='engagementcounter',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'hour'), name='engagement_kind_object_hour_unique'),
+        ),
+    ]
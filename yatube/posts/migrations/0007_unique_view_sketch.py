@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniqueViewSketch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('profile', 'Профиль')], max_length=8)),
+                ('object_id', models.PositiveIntegerField()),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='uniqueviewsketch',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'day'), name='sketch_kind_object_day_unique'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('index', 'Главная'), ('group', 'Группа'), ('profile', 'Профиль'), ('post', 'Пост')], max_length=8)),
+                ('key', models.CharField(blank=True, max_length=150)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_stale_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа')], max_length=8)),
+                ('object_id', models.PositiveIntegerField()),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+            ],
+            options={
+                'ordering': ('kind', 'rank'),
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
 TEXT_LENGTH = 15
 
 User = get_user_model()
@@ -41,17 +43,36 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    views = models.PositiveIntegerField('Просмотры', default=0)
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(name='post_feed', fields=['-pub_date', '-id']),
+            models.Index(
+                name='post_group_feed', fields=['group', '-pub_date', '-id']
+            ),
+            models.Index(
+                name='post_author_feed',
+                fields=['author', '-pub_date', '-id']
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:TEXT_LENGTH]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: по ней сигналы узнают о переносе.
+        post._loaded_group_id = post.__dict__.get('group_id', models.DEFERRED)
+        return post
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -105,3 +126,146 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user} follows {self.author}'
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.PositiveIntegerField('Общих подписок')
+    rank = models.PositiveSmallIntegerField('Место')
+
+    class Meta:
+        ordering = ('user', 'rank')
+        constraints = [
+            models.UniqueConstraint(
+                name='suggestion_user_author_unique',
+                fields=['user', 'author'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                name='suggestion_user_rank',
+                fields=['user', 'rank'],
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} may follow {self.author}'
+
+
+class FollowChange(models.Model):
+    """Пользователь, чьи подписки изменились с последнего пересчета
+    рекомендаций. Без внешнего ключа: запись появляется и тогда, когда
+    подписки удаляются вместе с самим пользователем.
+    """
+
+    user_id = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class EngagementCounter(models.Model):
+    """Активность вокруг поста или группы за один час."""
+
+    POST = 'post'
+    GROUP = 'group'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (GROUP, 'Группа'),
+    )
+
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    hour = models.PositiveIntegerField('Час от начала эпохи')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='engagement_kind_object_hour_unique',
+                fields=['kind', 'object_id', 'hour'],
+            ),
+        ]
+        indexes = [
+            models.Index(name='engagement_hour', fields=['hour']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} @ {self.hour}: {self.count}'
+
+
+class TrendingItem(models.Model):
+    """Место поста или группы в последнем пересчете популярного."""
+
+    kind = models.CharField(
+        max_length=8, choices=EngagementCounter.KIND_CHOICES
+    )
+    object_id = models.PositiveIntegerField()
+    score = models.FloatField('Оценка')
+    rank = models.PositiveSmallIntegerField('Место')
+
+    class Meta:
+        ordering = ('kind', 'rank')
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}: {self.rank}'
+
+
+class UniqueViewSketch(models.Model):
+    """HyperLogLog-скетч читателей поста или профиля за один день."""
+
+    POST = 'post'
+    PROFILE = 'profile'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (PROFILE, 'Профиль'),
+    )
+
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    day = models.DateField()
+    registers = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='sketch_kind_object_day_unique',
+                fields=['kind', 'object_id', 'day'],
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} @ {self.day}'
+
+
+class StaleSnapshot(models.Model):
+    """Страница, статический снимок которой нужно перепубликовать.
+
+    ``key`` — slug группы, имя автора или id поста. Без внешних ключей:
+    запись переживает удаление объекта, и его снимок удаляется.
+    """
+
+    INDEX = 'index'
+    GROUP = 'group'
+    PROFILE = 'profile'
+    POST = 'post'
+    KIND_CHOICES = (
+        (INDEX, 'Главная'),
+        (GROUP, 'Группа'),
+        (PROFILE, 'Профиль'),
+        (POST, 'Пост'),
+    )
+
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    key = models.CharField(max_length=150, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.kind} {self.key}'
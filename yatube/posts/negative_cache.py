@@ -0,0 +1,145 @@
+"""Отрицательный кэш: фильтры Блума по именам пользователей, slug групп
+и id постов.
+
+Если фильтр говорит, что объекта нет, view отдает 404 без запроса
+к базе. Фильтр собирает команда ``rebuild_negative_cache`` и хранит
+в кэше под версией, а процесс держит разобранную копию и на каждой
+проверке читает только номер версии. Нет фильтра — нет и отрицательных
+ответов, все идет в базу как обычно. Команда и воркеры должны видеть
+один кэш, поэтому с кэшем в памяти процесса включенный отрицательный
+кэш — ошибка проверки ``manage.py check``.
+
+Новые объекты в фильтр не дописываются: их ключи попадают в журнал —
+отдельные записи кэша, которые живут дольше любого фильтра, собранного
+без них. Отказ фильтра перепроверяется по журналу, поэтому объект,
+созданный после пересборки, доступен сразу.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from core.bloom import BloomFilter
+from core.cache import cache_lock, is_shared_cache
+
+from .models import Group, Post, User
+
+USERS = 'user'
+GROUPS = 'group'
+POSTS = 'post'
+
+SOURCES = {
+    USERS: lambda: User.objects.values_list('username', flat=True),
+    GROUPS: lambda: Group.objects.values_list('slug', flat=True),
+    POSTS: lambda: Post.objects.values_list('pk', flat=True),
+}
+MIN_CAPACITY = 1000
+
+loaded = {}
+
+
+def version_key(kind):
+    return f'negative_cache:{kind}'
+
+
+def data_key(kind, version):
+    return f'negative_cache:{kind}:{version}'
+
+
+def recent_key(kind, key):
+    return f'negative_cache:{kind}:recent:{key}'
+
+
+def check_shared_cache(app_configs, **kwargs):
+    if settings.NEGATIVE_CACHE_ENABLED and not is_shared_cache():
+        return [checks.Error(
+            'Отрицательному кэшу нужен общий для процессов кэш: фильтр '
+            'из rebuild_negative_cache не дойдет до воркеров.',
+            hint='Настройте общий бэкенд CACHES или выключите '
+                 'NEGATIVE_CACHE_ENABLED.',
+            id='posts.E001',
+        )]
+    return []
+
+
+def load(kind):
+    version = cache.get(version_key(kind))
+    if version is None:
+        return None
+    current = loaded.get(kind)
+    if current is not None and current[0] == version:
+        return current[1]
+    data = cache.get(data_key(kind, version))
+    if data is None:
+        return None
+    bloom = BloomFilter.from_bytes(data)
+    loaded[kind] = (version, bloom)
+    return bloom
+
+
+def might_exist(kind, key):
+    if not settings.NEGATIVE_CACHE_ENABLED:
+        return True
+    bloom = load(kind)
+    if bloom is None or str(key) in bloom:
+        return True
+    return cache.get(recent_key(kind, key)) is not None
+
+
+def check(kind, key):
+    """Бросает Http404, если фильтр точно знает, что объекта нет."""
+    if not might_exist(kind, key):
+        raise Http404
+
+
+def store(kind, bloom, timeout):
+    version = uuid.uuid4().hex
+    cache.set(data_key(kind, version), bloom.to_bytes(), timeout)
+    cache.set(version_key(kind), version, timeout)
+
+
+def remember(kind, key):
+    cache.set(recent_key(kind, key), 1, settings.NEGATIVE_CACHE_TIMEOUT)
+
+
+def added(kind, key):
+    """Записывает ключ нового объекта в журнал сейчас и после коммита.
+
+    Фильтр без ключа собран пересборкой, начатой до коммита, и живет
+    ``NEGATIVE_CACHE_TIMEOUT`` от ее начала, а запись журнала — столько
+    же от коммита, то есть дольше.
+    """
+    if not settings.NEGATIVE_CACHE_ENABLED:
+        return
+    remember(kind, key)
+    transaction.on_commit(lambda: remember(kind, key))
+
+
+def rebuild(kind):
+    """Собирает фильтр по базе. Возвращает число ключей или ``None``,
+    если фильтр сейчас обновляет другой процесс.
+    """
+    with cache_lock(
+        version_key(kind), settings.NEGATIVE_CACHE_REBUILD_LOCK
+    ) as acquired:
+        if not acquired:
+            return None
+        started = time.monotonic()
+        keys = SOURCES[kind]()
+        count = keys.count()
+        bloom = BloomFilter.for_capacity(
+            max(count * settings.NEGATIVE_CACHE_HEADROOM, MIN_CAPACITY),
+            settings.NEGATIVE_CACHE_ERROR_RATE,
+        )
+        for key in keys.iterator():
+            bloom.add(str(key))
+        elapsed = time.monotonic() - started
+        store(
+            kind, bloom,
+            max(1, int(settings.NEGATIVE_CACHE_TIMEOUT - elapsed)),
+        )
+        return count
@@ -0,0 +1,221 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.middleware.anonymous import invalidate_anonymous_cache
+
+from . import feeds, follow_graph, negative_cache, snapshots, trending
+from .models import (
+    Comment,
+    EngagementCounter,
+    Follow,
+    FollowChange,
+    Group,
+    Post,
+    StaleSnapshot,
+)
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_pages(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_anonymous_cache()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    follow_graph.invalidate(instance.user_id)
+    FollowChange.objects.create(user_id=instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+    weight = settings.TRENDING_WEIGHTS['comment']
+    trending.bump(EngagementCounter.POST, instance.post_id, weight)
+    if instance.post.group_id:
+        trending.bump(EngagementCounter.GROUP, instance.post.group_id, weight)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created and instance.group_id:
+        trending.bump(
+            EngagementCounter.GROUP,
+            instance.group_id,
+            settings.TRENDING_WEIGHTS['post'],
+        )
+
+
+@receiver(pre_save, sender=Post)
+def previous_group_changed(sender, instance, **kwargs):
+    """Пост, перенесенный в другую группу, пропадает из прежней:
+    устаревают ее лента и снимок.
+
+    Прежняя группа берется из загруженного поста, так что сохранение
+    без переноса не делает запросов.
+    """
+    if instance.pk is None:
+        return
+    previous = getattr(instance, '_loaded_group_id', DEFERRED)
+    if previous is DEFERRED:
+        previous = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', flat=True
+        ).first()
+    if previous is None or previous == instance.group_id:
+        return
+    slug = Group.objects.filter(pk=previous).values_list(
+        'slug', flat=True
+    ).first()
+    if slug is None:
+        return
+    feeds.invalidate(feeds.group_scope(slug))
+    if settings.STATIC_SNAPSHOT_ROOT:
+        snapshots.enqueue((StaleSnapshot.GROUP, slug))
+
+
+@receiver(post_save, sender=Post)
+def saved_group(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def snapshot_post(sender, instance, **kwargs):
+    if not settings.STATIC_SNAPSHOT_ROOT:
+        return
+    targets = [
+        (StaleSnapshot.INDEX, ''),
+        (StaleSnapshot.PROFILE, instance.author.username),
+        (StaleSnapshot.POST, instance.pk),
+    ]
+    if instance.group_id:
+        targets.append((StaleSnapshot.GROUP, instance.group.slug))
+    snapshots.enqueue(*targets)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def snapshot_comment(sender, instance, **kwargs):
+    if settings.STATIC_SNAPSHOT_ROOT:
+        snapshots.enqueue((StaleSnapshot.POST, instance.post_id))
+
+
+@receiver(pre_save, sender=Group)
+def previous_slug_changed(sender, instance, **kwargs):
+    """Лента и снимок группы под прежним slug больше не существуют."""
+    if instance.pk is None:
+        return
+    slug = Group.objects.filter(pk=instance.pk).values_list(
+        'slug', flat=True
+    ).first()
+    if slug in (None, instance.slug):
+        return
+    feeds.invalidate(feeds.group_scope(slug))
+    if settings.STATIC_SNAPSHOT_ROOT:
+        snapshots.enqueue((StaleSnapshot.GROUP, slug))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def snapshot_group(sender, instance, **kwargs):
+    if settings.STATIC_SNAPSHOT_ROOT:
+        snapshots.enqueue((StaleSnapshot.GROUP, instance.slug))
+
+
+@receiver(post_delete, sender=User)
+def snapshot_profile(sender, instance, **kwargs):
+    if settings.STATIC_SNAPSHOT_ROOT:
+        snapshots.enqueue((StaleSnapshot.PROFILE, instance.username))
+
+
+@receiver(post_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    negative_cache.added(negative_cache.USERS, instance.username)
+
+
+@receiver(post_save, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    negative_cache.added(negative_cache.GROUPS, instance.slug)
+
+
+@receiver(post_save, sender=Post)
+def remember_post(sender, instance, created, **kwargs):
+    if created:
+        negative_cache.added(negative_cache.POSTS, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_feeds_changed(sender, instance, **kwargs):
+    scopes = [feeds.SITE, feeds.author_scope(instance.author.username)]
+    if instance.group_id:
+        scopes.append(feeds.group_scope(instance.group.slug))
+    feeds.invalidate(*scopes)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_feed_changed(sender, instance, **kwargs):
+    feeds.invalidate(feeds.group_scope(instance.slug))
+
+
+@receiver(pre_save, sender=User)
+def previous_username_changed(sender, instance, update_fields=None,
+                              **kwargs):
+    """Лента и профиль автора под прежним именем больше не существуют,
+    а ленты и снимки групп, главной и постов автора показывают прежнее
+    имя.
+    """
+    if instance.pk is None:
+        return
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list(
+        'username', 'first_name', 'last_name'
+    ).first()
+    current = (instance.username, instance.first_name, instance.last_name)
+    if previous in (None, current):
+        return
+    slugs = list(Group.objects.filter(
+        group_posts__author=instance.pk
+    ).values_list('slug', flat=True).distinct())
+    feeds.invalidate(
+        feeds.author_scope(previous[0]),
+        *(feeds.group_scope(slug) for slug in slugs),
+    )
+    if settings.STATIC_SNAPSHOT_ROOT:
+        post_ids = Post.objects.filter(author=instance.pk).values_list(
+            'pk', flat=True
+        )
+        snapshots.enqueue(
+            (StaleSnapshot.INDEX, ''),
+            (StaleSnapshot.PROFILE, previous[0]),
+            (StaleSnapshot.PROFILE, instance.username),
+            *((StaleSnapshot.GROUP, slug) for slug in slugs),
+            *((StaleSnapshot.POST, pk) for pk in post_ids),
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def author_feeds_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    feeds.invalidate(feeds.SITE, feeds.author_scope(instance.username))
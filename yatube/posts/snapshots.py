@@ -0,0 +1,162 @@
+import inspect
+import math
+import os
+import re
+import tempfile
+from urllib.parse import unquote
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import resolve, reverse
+from django.utils._os import safe_join
+
+from .models import Group, Post, StaleSnapshot, User
+from .views import POSTS_ON_PAGE
+
+PAGE_FILE_RE = re.compile(r'^page-(\d+)\.html$')
+
+
+def enqueue(*targets):
+    """Ставит страницы ``(kind, key)`` в очередь перепубликации."""
+    StaleSnapshot.objects.bulk_create(
+        StaleSnapshot(kind=kind, key=str(key)) for kind, key in targets
+    )
+
+
+def page_path(kind, key):
+    if kind == StaleSnapshot.INDEX:
+        return reverse('posts:index')
+    if kind == StaleSnapshot.GROUP:
+        return reverse('posts:group_posts', args=(key,))
+    if kind == StaleSnapshot.PROFILE:
+        return reverse('posts:profile', args=(key,))
+    return reverse('posts:post_detail', args=(key,))
+
+
+def page_count(kind, key):
+    """Число страниц ленты или 0, если страницы больше нет."""
+    if kind == StaleSnapshot.POST:
+        return int(Post.objects.filter(pk=key).exists())
+    if kind == StaleSnapshot.INDEX:
+        posts = Post.objects.all()
+    elif kind == StaleSnapshot.GROUP:
+        posts = Post.objects.filter(group__slug=key)
+        if not Group.objects.filter(slug=key).exists():
+            return 0
+    else:
+        posts = Post.objects.filter(author__username=key)
+        if not User.objects.filter(username=key).exists():
+            return 0
+    return max(1, math.ceil(posts.count() / POSTS_ON_PAGE))
+
+
+def snapshot_dir(root, path):
+    """Каталог снимков страницы: ``/group/cats/`` — ``<root>/group/cats``.
+
+    Прокси ищет ``<каталог>/page-<page>.html``, а затем
+    ``<каталог>/index.html``. Снимок — страница анонима, поэтому
+    запрос с cookie сессии идет в Django, например в nginx::
+
+        map $cookie_sessionid $snapshots {
+            ''      /snapshots;
+            default /no-snapshots;
+        }
+
+        try_files $snapshots$uri/page-$arg_page.html
+                  $snapshots$uri/index.html @django;
+    """
+    parts = [part for part in unquote(path).split('/') if part]
+    if any(part in ('.', '..') for part in parts):
+        raise SuspiciousFileOperation(f'Недопустимый путь снимка: {path}')
+    return safe_join(root, *parts)
+
+
+def snapshot_name(page):
+    return 'index.html' if page == 1 else f'page-{page}.html'
+
+
+def render_page(path, page):
+    """Рендерит страницу так, как ее видит аноним, в обход кэшей
+    и потокового рендеринга.
+    """
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    if page > 1:
+        request.GET = QueryDict(f'page={page}')
+    request.user = AnonymousUser()
+    request.full_body_required = True
+    match = request.resolver_match = resolve(path)
+    view = inspect.unwrap(match.func)
+    return view(request, *match.args, **match.kwargs)
+
+
+def write_atomic(path, content):
+    """Записывает файл через временный файл и ``os.replace``: прокси
+    видит либо старый снимок, либо новый целиком.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            target.write(content)
+            target.flush()
+            os.fsync(target.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_pages(directory, pages):
+    """Удаляет снимки страниц с номером больше ``pages``."""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        match = PAGE_FILE_RE.match(name)
+        if name == 'index.html':
+            number = 1
+        elif match:
+            number = int(match[1])
+        else:
+            continue
+        if number > pages:
+            os.remove(os.path.join(directory, name))
+
+
+def publish(root, kind, key):
+    """Перепубликует все страницы снимка и удаляет лишние.
+
+    Возвращает число записанных файлов.
+    """
+    path = page_path(kind, key)
+    directory = snapshot_dir(root, path)
+    pages = page_count(kind, key)
+    for page in range(1, pages + 1):
+        try:
+            response = render_page(path, page)
+        except Http404:
+            response = None
+        if response is None or response.status_code != 200:
+            pages = page - 1
+            break
+        write_atomic(
+            os.path.join(directory, snapshot_name(page)), response.content
+        )
+    remove_pages(directory, pages)
+    return pages
+
+
+def all_targets():
+    yield StaleSnapshot.INDEX, ''
+    for slug in Group.objects.values_list('slug', flat=True).iterator():
+        yield StaleSnapshot.GROUP, slug
+    for username in User.objects.values_list(
+            'username', flat=True).iterator():
+        yield StaleSnapshot.PROFILE, username
+    for pk in Post.objects.values_list('pk', flat=True).iterator():
+        yield StaleSnapshot.POST, pk
@@ -0,0 +1,117 @@
+"""Рекомендации «кого почитать» по общим подпискам.
+
+Автор C рекомендуется пользователю U, если на него подписаны авторы,
+на которых подписан U; оценка — число таких путей U -> B -> C, то есть
+строка U матрицы A·A, где A — матрица смежности подписок. Если
+установлен NumPy, строка считается векторно по CSR-представлению A,
+иначе — счетчиком на чистом Python. Результаты совпадают.
+"""
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.conf import settings
+
+from . import follow_graph
+from .models import Follow, FollowSuggestion
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def load_following():
+    """Список ребер Follow: ``{user_id: [author_id, ...]}``."""
+    following = defaultdict(list)
+    edges = (
+        Follow.objects.order_by('user_id', 'author_id')
+        .values_list('user_id', 'author_id')
+        .iterator()
+    )
+    for user_id, author_id in edges:
+        following[user_id].append(author_id)
+    return following
+
+
+def rank_python(following, user_ids, limit):
+    for user_id in user_ids:
+        followed = following.get(user_id, ())
+        scores = Counter()
+        for author_id in followed:
+            scores.update(following.get(author_id, ()))
+        excluded = set(followed)
+        excluded.add(user_id)
+        ranked = sorted(
+            (-score, author_id) for author_id, score in scores.items()
+            if author_id not in excluded
+        )[:limit]
+        yield user_id, [(author_id, -score) for score, author_id in ranked]
+
+
+def rank_numpy(following, user_ids, limit):
+    ids = np.array(
+        sorted(set(following).union(*following.values())), dtype=np.int64
+    )
+    counts = [len(following.get(node, ())) for node in ids.tolist()]
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.searchsorted(ids, np.fromiter(
+        chain.from_iterable(following.get(node, ()) for node in ids.tolist()),
+        dtype=np.int64,
+        count=int(indptr[-1]),
+    ))
+    for user_id in user_ids:
+        if not following.get(user_id):
+            yield user_id, []
+            continue
+        row = int(np.searchsorted(ids, user_id))
+        neighbors = indices[indptr[row]:indptr[row + 1]]
+        # Строки соседей склеиваются в один массив позиций без цикла:
+        # позиции блока k — starts[k] плюс смещение внутри блока.
+        starts = indptr[neighbors]
+        lengths = indptr[neighbors + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            yield user_id, []
+            continue
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        scores = np.bincount(
+            indices[offsets + np.arange(total)], minlength=len(ids)
+        )
+        scores[neighbors] = 0
+        scores[row] = 0
+        candidates = np.flatnonzero(scores)
+        order = np.lexsort((candidates, -scores[candidates]))[:limit]
+        yield user_id, [
+            (int(ids[index]), int(scores[index]))
+            for index in candidates[order]
+        ]
+
+
+def rank_suggestions(following, user_ids, limit):
+    """Лучшие ``limit`` авторов для каждого пользователя из ``user_ids``:
+    пары ``(author_id, score)`` по убыванию оценки, при равенстве —
+    по id.
+    """
+    rank = rank_python if np is None else rank_numpy
+    return rank(following, user_ids, limit)
+
+
+def suggestions_for(user):
+    """Рекомендации для страницы: один запрос по индексу (user, rank).
+
+    Авторы, на которых пользователь подписался после пересчета,
+    отбрасываются по кэшу подписок.
+    """
+    if not user.is_authenticated:
+        return []
+    suggestions = list(
+        FollowSuggestion.objects.filter(user=user).select_related('author')
+    )
+    following = follow_graph.following_map(
+        user, [suggestion.author_id for suggestion in suggestions]
+    )
+    return [
+        suggestion for suggestion in suggestions
+        if not following[suggestion.author_id]
+    ][:settings.FOLLOW_SUGGESTIONS_SHOWN]
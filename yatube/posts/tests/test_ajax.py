@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class AjaxEndpointsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.post = Post.objects.create(author=cls.author, text='Текст поста')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.follow_url = reverse(
+            'posts:profile_follow_json', args=(self.author.username,)
+        )
+        self.unfollow_url = reverse(
+            'posts:profile_unfollow_json', args=(self.author.username,)
+        )
+        self.comment_url = reverse(
+            'posts:add_comment_fragment', args=(self.post.id,)
+        )
+
+    def test_follow_and_unfollow_return_state(self):
+        """Подписка и отписка возвращают новое состояние и счетчики."""
+        response = self.authorized_client.post(self.follow_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {'following': True, 'followers': 1, 'follows': 1}
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        response = self.authorized_client.post(self.unfollow_url)
+        self.assertEqual(
+            response.json(),
+            {'following': False, 'followers': 0, 'follows': 0}
+        )
+
+    def test_self_follow_is_ignored(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(self.follow_url)
+        self.assertFalse(response.json()['following'])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_guest_gets_401(self):
+        """Аноним получает JSON с ошибкой, а не редирект на вход."""
+        for url in (self.follow_url, self.unfollow_url, self.comment_url):
+            with self.subTest(url=url):
+                response = self.guest_client.post(url)
+                self.assertEqual(response.status_code, 401)
+                self.assertIn('error', response.json())
+
+    def test_get_not_allowed(self):
+        for url in (self.follow_url, self.unfollow_url, self.comment_url):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 405)
+
+    def test_comment_fragment(self):
+        """Новый комментарий возвращается готовым фрагментом страницы."""
+        response = self.authorized_client.post(
+            self.comment_url, {'text': 'Новый комментарий'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, 'posts/includes/comment.html')
+        self.assertContains(response, 'Новый комментарий', status_code=201)
+        self.assertContains(response, self.user.username, status_code=201)
+        self.assertTrue(
+            Comment.objects.filter(
+                post=self.post, author=self.user, text='Новый комментарий'
+            ).exists()
+        )
+
+    def test_invalid_comment(self):
+        response = self.authorized_client.post(self.comment_url, {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_post_detail_uses_comment_include(self):
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Старый комментарий'
+        )
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('id="comments"', content)
+        self.assertInHTML(
+            render_to_string(
+                'posts/includes/comment.html',
+                {'comment': self.post.comments.get()},
+            ),
+            content,
+        )
@@ -0,0 +1,178 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import get_or_rebuild
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='writer', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков'
+        )
+        cls.other_group = Group.objects.create(
+            title='Собаки', slug='dogs', description='Про собак'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост про кота'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.urls = {
+            'site': (reverse('posts:feed'), reverse('posts:feed_atom')),
+            'group': (
+                reverse('posts:group_feed', args=(self.group.slug,)),
+                reverse('posts:group_feed_atom', args=(self.group.slug,)),
+            ),
+            'author': (
+                reverse('posts:profile_feed', args=(self.author.username,)),
+                reverse(
+                    'posts:profile_feed_atom', args=(self.author.username,)
+                ),
+            ),
+        }
+
+    def test_feeds(self):
+        """RSS и Atom для сайта, группы и автора с ETag и Last-Modified."""
+        for name, (rss, atom) in self.urls.items():
+            for url, content_type in ((rss, 'application/rss+xml'),
+                                      (atom, 'application/atom+xml')):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(
+                        response['Content-Type'].startswith(content_type)
+                    )
+                    self.assertContains(response, 'Пост про кота')
+                    self.assertContains(response, 'Лев Толстой')
+                    self.assertTrue(response.has_header('ETag'))
+                    self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_not_modified_without_queries(self):
+        """Повторный опрос отдается из кэша, а с ETag или датой — 304."""
+        url = self.urls['group'][0]
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+            by_etag = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            by_date = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_date.status_code, 304)
+        self.assertEqual(by_etag['ETag'], response['ETag'])
+
+    def test_write_invalidates_affected_feeds(self):
+        """Новый пост обновляет ленты сайта, группы и автора, но не
+        чужой группы.
+        """
+        other_url = reverse('posts:group_feed', args=(self.other_group.slug,))
+        before = {
+            name: self.client.get(urls[0])['ETag']
+            for name, urls in self.urls.items()
+        }
+        other_before = self.client.get(other_url)['ETag']
+        Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост'
+        )
+        for name, urls in self.urls.items():
+            with self.subTest(name=name):
+                response = self.client.get(
+                    urls[0], HTTP_IF_NONE_MATCH=before[name]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Новый пост')
+        self.assertEqual(self.client.get(other_url)['ETag'], other_before)
+
+    def test_moved_post_leaves_previous_group(self):
+        url = self.urls['group'][0]
+        self.client.get(url)
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertNotContains(self.client.get(url), 'Пост про кота')
+
+    def test_saved_post_keeps_group_feed(self):
+        """Сохранение поста без переноса не ищет прежнюю группу."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Пост про кота и кошку'
+        with mock.patch('posts.feeds.invalidate') as invalidate:
+            # UPDATE и автор с группой для сброса лент.
+            with self.assertNumQueries(3):
+                post.save()
+        invalidate.assert_called_once()
+
+    def test_renamed_author(self):
+        """После переименования лента под прежним именем не отдается
+        из кэша, а лента группы показывает новое имя.
+        """
+        old_url = self.urls['author'][0]
+        group_url = self.urls['group'][0]
+        self.client.get(old_url)
+        self.client.get(group_url)
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'novelist'
+        author.first_name = 'Лев Николаевич'
+        author.save()
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertContains(
+            self.client.get(group_url), 'Лев Николаевич Толстой'
+        )
+
+    @override_settings(FEED_CACHE_TIMEOUT=60 * 60, LOCAL_CACHE_TIMEOUT=30)
+    def test_short_timeout_in_local_cache(self):
+        """В кэше процесса лента хранится недолго: сброс версии
+        из другого воркера сюда не дойдет.
+        """
+        target = 'posts.feeds.get_or_rebuild'
+        with mock.patch(target, wraps=get_or_rebuild) as rebuild:
+            self.client.get(self.urls['site'][0])
+        self.assertEqual(rebuild.call_args[0][2], 30)
+
+    def test_links_follow_scheme(self):
+        """Ссылки в ленте строятся по схеме запроса, а не по первой
+        закэшированной.
+        """
+        url = self.urls['site'][0]
+        self.client.get(url)
+        response = self.client.get(url, secure=True)
+        self.assertContains(response, 'https://testserver/')
+        self.assertNotContains(response, 'http://testserver/')
+
+    @override_settings(FEED_ITEMS=3)
+    def test_items_limit(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Запись {number}')
+            for number in range(5)
+        )
+        response = self.client.get(self.urls['site'][0])
+        self.assertEqual(response.content.count(b'<item>'), 3)
+        self.assertContains(response, 'Запись 4')
+
+    def test_missing_objects(self):
+        for url in (
+            reverse('posts:group_feed', args=('no-such-group',)),
+            reverse('posts:profile_feed_atom', args=('nobody',)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_pages_link_feeds(self):
+        response = self.client.get(
+            reverse('posts:group_posts', args=(self.group.slug,))
+        )
+        self.assertContains(response, self.urls['group'][0])
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.routers import use_replica
+from posts import follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(5)
+        ]
+        for author in cls.authors[::2]:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_built_from_primary(self):
+        """Кэш подписок собирается по основной базе, даже когда чтение
+        запроса идет в реплику.
+        """
+        use_replica(True)
+        self.addCleanup(use_replica, False)
+        self.assertEqual(
+            list(follow_graph.following_ids(self.user.pk)),
+            [author.pk for author in self.authors[::2]]
+        )
+
+    def test_following_map_single_query(self):
+        """Подписки на целую страницу авторов проверяются одним запросом."""
+        author_ids = [author.pk for author in self.authors]
+        with self.assertNumQueries(1):
+            first = follow_graph.following_map(self.user, author_ids)
+        with self.assertNumQueries(0):
+            second = follow_graph.following_map(self.user, author_ids)
+        expected = {
+            author.pk: index % 2 == 0
+            for index, author in enumerate(self.authors)
+        }
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+
+    def test_anonymous(self):
+        """Аноним ни на кого не подписан и не трогает кэш."""
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                follow_graph.is_following(AnonymousUser(), self.authors[0])
+            )
+
+    def test_follow_and_unfollow_update_graph(self):
+        """Подписка и отписка сразу видны на странице профиля."""
+        author = self.authors[1]
+        profile = reverse('posts:profile', args=(author.username,))
+        self.assertFalse(self.client.get(profile).context['following'])
+        self.client.get(reverse('posts:profile_follow', args=(author,)))
+        self.assertTrue(self.client.get(profile).context['following'])
+        self.client.get(reverse('posts:profile_unfollow', args=(author,)))
+        self.assertFalse(self.client.get(profile).context['following'])
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -7,6 +8,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core.storage import sharded_name
 from posts.models import Comment, Group, Post
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -34,6 +36,9 @@ SMALL_GIF = (
     b'\x02\x00\x01\x00\x00\x02\x02\x0C'
     b'\x0A\x00\x3B'
 )
+SMALL_GIF_NAME = sharded_name(
+    'posts', hashlib.sha256(SMALL_GIF).hexdigest(), 'small.gif'
+)
 
 User = get_user_model()
 
@@ -96,7 +101,7 @@ class PostFormsTests(TestCase):
         last_post = Post.objects.first()
         self.assertEqual(last_post.text, form_data['text'])
         self.assertEqual(last_post.group.pk, form_data['group'])
-        self.assertEqual(last_post.image, f'posts/{uploaded.name}')
+        self.assertEqual(last_post.image, SMALL_GIF_NAME)
         self.assertEqual(last_post.author, PostFormsTests.author)
 
     def test_create_post_by_guest(self):
@@ -154,7 +159,7 @@ class PostFormsTests(TestCase):
         edited_post = Post.objects.get(pk=post_id)
         self.assertEqual(edited_post.text, form_edit_data['text'])
         self.assertEqual(edited_post.group.pk, form_edit_data['group'])
-        self.assertEqual(edited_post.image, f'posts/{edited.name}')
+        self.assertEqual(edited_post.image, SMALL_GIF_NAME)
         self.assertEqual(edited_post.author, PostFormsTests.author)
 
     def test_edit_post_not_author(self):
@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cursors import decode_cursor, encode_cursor, page_after
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+POSTS_COUNT = 25
+
+
+class FeedFragmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(POSTS_COUNT)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def collect(self, client, url):
+        """Проходит ленту по курсорам и возвращает тексты постов."""
+        texts = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            texts.extend(post.text for post in response.context['posts'])
+            url = response.context['next_fragment']
+        return texts
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.first()
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)), (post.pub_date, post.pk)
+        )
+
+    def test_page_after_with_equal_dates(self):
+        """Посты с одинаковой датой не теряются и не повторяются."""
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            page, cursor = page_after(Post.objects.all(), cursor, 7)
+            seen.extend(post.pk for post in page)
+        self.assertEqual(
+            seen, list(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_fragments_cover_feed(self):
+        """Порции лент по курсорам повторяют ленту без пропусков."""
+        expected = list(Post.objects.values_list('text', flat=True))
+        urls = (
+            (self.guest_client, reverse('posts:index_fragment')),
+            (self.guest_client, reverse(
+                'posts:group_posts_fragment', args=(self.group.slug,)
+            )),
+            (self.guest_client, reverse(
+                'posts:profile_fragment', args=(self.author.username,)
+            )),
+            (self.authorized_client, reverse('posts:follow_fragment')),
+        )
+        for client, url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.collect(client, url), expected)
+
+    def test_page_links_to_next_fragment(self):
+        """Страница ленты продолжается порцией со второй страницы."""
+        response = self.guest_client.get(reverse('posts:index'))
+        fragment = self.guest_client.get(response.context['next_fragment'])
+        second_page = self.guest_client.get(
+            reverse('posts:index') + '?page=2'
+        )
+        self.assertEqual(
+            list(fragment.context['posts']),
+            list(second_page.context['page_obj'])
+        )
+        self.assertContains(response, 'data-next-url')
+
+    def test_fragment_without_layout(self):
+        response = self.guest_client.get(reverse('posts:index_fragment'))
+        self.assertTemplateUsed(response, 'posts/includes/post_card.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, 'data-next-url')
+
+    def test_profile_fragment_hides_author(self):
+        response = self.guest_client.get(
+            reverse('posts:profile_fragment', args=(self.author.username,))
+        )
+        self.assertNotContains(response, 'все посты пользователя')
+
+    def test_fragment_is_cached(self):
+        """Порция по курсору собирается одним запросом и кэшируется."""
+        cursor = encode_cursor(Post.objects.all()[POSTS_COUNT // 2])
+        url = reverse('posts:index_fragment') + f'?after={cursor}'
+        with self.assertNumQueries(1):
+            first = self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_invalid_cursor(self):
+        for cursor in ('abc', '1', '99999999999999999999999.1'):
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(
+                    reverse('posts:index_fragment') + f'?after={cursor}'
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_follow_fragment_requires_login(self):
+        response = self.guest_client.get(reverse('posts:follow_fragment'))
+        self.assertEqual(response.status_code, 302)
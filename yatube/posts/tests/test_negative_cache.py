@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import cache_lock
+from posts import negative_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(NEGATIVE_CACHE_ENABLED=True)
+class NegativeCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(
+            title='Котики', slug='cats', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+
+    def setUp(self):
+        cache.clear()
+        negative_cache.loaded.clear()
+        self.client = Client()
+        call_command('rebuild_negative_cache', stdout=StringIO())
+
+    def test_missing_pages_without_queries(self):
+        """Несуществующие страницы отдают 404, не обращаясь к базе."""
+        urls = (
+            reverse('posts:profile', args=('nobody',)),
+            reverse('posts:group_posts', args=('no-such-group',)),
+            reverse('posts:post_detail', args=(self.post.pk + 1000,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_existing_pages(self):
+        urls = (
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:group_posts', args=(self.group.slug,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_created_objects_reachable(self):
+        """Новые объекты доступны сразу, а фильтр не переписывается."""
+        version = cache.get(negative_cache.version_key(negative_cache.USERS))
+        user = User.objects.create_user(username='newcomer')
+        group = Group.objects.create(
+            title='Собаки', slug='dogs', description='Описание'
+        )
+        post = Post.objects.create(author=user, group=group, text='Новый')
+        negative_cache.loaded.clear()
+        self.assertTrue(
+            negative_cache.might_exist(negative_cache.USERS, 'newcomer')
+        )
+        self.assertTrue(
+            negative_cache.might_exist(negative_cache.GROUPS, 'dogs')
+        )
+        self.assertTrue(
+            negative_cache.might_exist(negative_cache.POSTS, post.pk)
+        )
+        self.assertEqual(
+            cache.get(negative_cache.version_key(negative_cache.USERS)),
+            version
+        )
+        self.assertFalse(
+            negative_cache.might_exist(negative_cache.USERS, 'nobody')
+        )
+
+    def test_busy_rebuild_keeps_filter(self):
+        """Пересборка, не получившая блокировку, ничего не меняет,
+        а объект, созданный тем временем, остается доступным.
+        """
+        with cache_lock(negative_cache.version_key(negative_cache.USERS)):
+            User.objects.create_user(username='newcomer')
+            self.assertIsNone(negative_cache.rebuild(negative_cache.USERS))
+        self.assertTrue(
+            negative_cache.might_exist(negative_cache.USERS, 'newcomer')
+        )
+        self.assertFalse(
+            negative_cache.might_exist(negative_cache.USERS, 'nobody')
+        )
+
+    def test_shared_cache_required(self):
+        """Включенный отрицательный кэш требует общего бэкенда кэша."""
+        errors = negative_cache.check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['posts.E001'])
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache',
+        }}):
+            self.assertEqual(negative_cache.check_shared_cache(None), [])
+
+    def test_without_filter(self):
+        cache.clear()
+        self.assertTrue(
+            negative_cache.might_exist(negative_cache.USERS, 'nobody')
+        )
+        with override_settings(NEGATIVE_CACHE_ENABLED=False):
+            call_command('rebuild_negative_cache', stdout=StringIO())
+            self.assertTrue(
+                negative_cache.might_exist(negative_cache.USERS, 'nobody')
+            )
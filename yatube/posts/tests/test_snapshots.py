@@ -0,0 +1,148 @@
+import os
+import shutil
+import stat
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Group, Post, StaleSnapshot
+
+User = get_user_model()
+
+SNAPSHOT_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(STATIC_SNAPSHOT_ROOT=SNAPSHOT_ROOT)
+class PublishStaticTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SNAPSHOT_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(SNAPSHOT_ROOT, ignore_errors=True)
+        self.author = User.objects.create_user(username='writer')
+        self.group = Group.objects.create(
+            title='Котики', slug='cats', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Первый пост'
+        )
+
+    def publish(self, *args):
+        call_command('publish_static', *args, stdout=StringIO())
+
+    def read(self, *parts):
+        with open(os.path.join(SNAPSHOT_ROOT, *parts), encoding='utf-8') as f:
+            return f.read()
+
+    def test_publish_all(self):
+        """Публикуются главная, группа, профиль и пост без временных
+        файлов и с правами на чтение для прокси.
+        """
+        self.publish('--all')
+        for parts in (
+            ('index.html',),
+            ('group', 'cats', 'index.html'),
+            ('profile', 'writer', 'index.html'),
+            ('posts', str(self.post.pk), 'index.html'),
+        ):
+            with self.subTest(parts=parts):
+                self.assertIn('Первый пост', self.read(*parts))
+                mode = os.stat(os.path.join(SNAPSHOT_ROOT, *parts)).st_mode
+                self.assertEqual(stat.S_IMODE(mode), 0o644)
+        for _, _, files in os.walk(SNAPSHOT_ROOT):
+            self.assertFalse([name for name in files if name.endswith('.tmp')])
+        self.assertFalse(StaleSnapshot.objects.exists())
+
+    def test_anonymous_render(self):
+        """Снимок — страница анонима: без формы комментария."""
+        self.publish('--all')
+        html = self.read('posts', str(self.post.pk), 'index.html')
+        self.assertNotIn('Добавить комментарий', html)
+        self.assertNotIn('csrfmiddlewaretoken', html)
+
+    def test_queue_republishes_affected_pages(self):
+        self.publish('--all')
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый отзыв'
+        )
+        self.assertEqual(
+            set(StaleSnapshot.objects.values_list('kind', 'key')),
+            {(StaleSnapshot.POST, str(self.post.pk))}
+        )
+        self.publish()
+        self.assertIn(
+            'Новый отзыв', self.read('posts', str(self.post.pk), 'index.html')
+        )
+        self.assertFalse(StaleSnapshot.objects.exists())
+
+    def test_pagination_and_removal(self):
+        """Лишние страницы и снимки удаленных постов стираются."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}')
+            for number in range(12)
+        )
+        self.publish('--all')
+        self.assertIn('Первый пост', self.read('page-2.html'))
+        Post.objects.exclude(pk=self.post.pk).delete()
+        self.post.delete()
+        self.publish()
+        self.assertFalse(
+            os.path.exists(os.path.join(SNAPSHOT_ROOT, 'page-2.html'))
+        )
+        self.assertFalse(os.path.exists(os.path.join(
+            SNAPSHOT_ROOT, 'posts', str(self.post.pk), 'index.html'
+        )))
+        self.assertNotIn('Первый пост', self.read('index.html'))
+
+    def test_moved_post_updates_previous_group(self):
+        self.publish('--all')
+        dogs = Group.objects.create(
+            title='Собаки', slug='dogs', description='Описание'
+        )
+        self.post.group = dogs
+        self.post.save()
+        self.publish()
+        self.assertNotIn(
+            'Первый пост', self.read('group', 'cats', 'index.html')
+        )
+        self.assertIn('Первый пост', self.read('group', 'dogs', 'index.html'))
+
+    def test_renamed_author_republished(self):
+        """После переименования автора профиль публикуется под новым
+        именем, а снимки под прежним удаляются.
+        """
+        self.publish('--all')
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'novelist'
+        author.save()
+        self.publish()
+        self.assertIn(
+            'Первый пост', self.read('profile', 'novelist', 'index.html')
+        )
+        self.assertFalse(os.path.exists(os.path.join(
+            SNAPSHOT_ROOT, 'profile', 'writer', 'index.html'
+        )))
+        self.assertIn('novelist', self.read('group', 'cats', 'index.html'))
+
+    def test_unsafe_path_skipped(self):
+        User.objects.create_user(username='..')
+        stderr = StringIO()
+        call_command('publish_static', '--all', stdout=StringIO(),
+                     stderr=stderr)
+        self.assertIn('..', stderr.getvalue())
+        self.assertIn('Первый пост', self.read('index.html'))
+
+
+class SnapshotQueueDisabledTests(TestCase):
+    @override_settings(STATIC_SNAPSHOT_ROOT=None)
+    def test_no_queue_without_root(self):
+        author = User.objects.create_user(username='writer')
+        Post.objects.create(author=author, text='Текст')
+        self.assertFalse(StaleSnapshot.objects.exists())
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, FollowChange, FollowSuggestion
+from posts.suggestions import rank_python
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'other', 'popular', 'niche')
+        }
+        for user, author in (('reader', 'friend'), ('reader', 'other'),
+                             ('friend', 'popular'), ('other', 'popular'),
+                             ('friend', 'niche')):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.users['reader'])
+
+    def compute(self, *args):
+        call_command('compute_follow_suggestions', *args, stdout=StringIO())
+
+    def ranked(self, name):
+        return list(
+            FollowSuggestion.objects.filter(user=self.users[name])
+            .values_list('author__username', 'score')
+        )
+
+    def test_rank_python(self):
+        """Оценка — число путей через подписки, без уже подписанных."""
+        following = {1: [2, 3], 2: [1, 4, 5], 3: [4]}
+        self.assertEqual(
+            list(rank_python(following, [1], 10)), [(1, [(4, 2), (5, 1)])]
+        )
+
+    def test_full_recompute(self):
+        """Полный пересчет сохраняет рекомендации и очищает журнал."""
+        self.compute('--full')
+        self.assertEqual(
+            self.ranked('reader'), [('popular', 2), ('niche', 1)]
+        )
+        self.assertFalse(FollowChange.objects.exists())
+
+    def test_incremental_recompute(self):
+        """Пересчитываются изменившиеся пользователи и их подписчики."""
+        self.compute('--full')
+        Follow.objects.filter(
+            user=self.users['friend'], author=self.users['niche']
+        ).delete()
+        self.assertEqual(self.ranked('reader'), [
+            ('popular', 2), ('niche', 1)
+        ])
+        self.compute()
+        self.assertEqual(self.ranked('reader'), [('popular', 2)])
+        self.assertFalse(FollowChange.objects.exists())
+
+    def test_pages_show_suggestions(self):
+        """Профиль и лента подписок показывают рекомендации
+        без уже подписанных авторов.
+        """
+        self.compute('--full')
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.users['popular'], self.users['niche']]
+        )
+        Follow.objects.create(
+            user=self.users['reader'], author=self.users['popular']
+        )
+        response = self.client.get(
+            reverse('posts:profile', args=('niche',))
+        )
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.users['niche']]
+        )
+        self.assertContains(response, 'Кого почитать')
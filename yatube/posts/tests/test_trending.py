@@ -0,0 +1,95 @@
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import (Comment, EngagementCounter, Group, Post,
+                          TrendingItem)
+from posts.trending import (bump, compute_trending, current_hour,
+                            get_trending)
+
+User = get_user_model()
+
+
+@override_settings(
+    TRENDING_WINDOW_HOURS=24,
+    TRENDING_HALF_LIFE=1,
+    TRENDING_WEIGHTS={'comment': 1, 'post': 3},
+)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.quiet = Post.objects.create(text='Тихий', author=cls.author)
+        cls.hot = Post.objects.create(
+            text='Горячий', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_updated_on_create(self):
+        """Комментарий и новый пост увеличивают почасовые счетчики."""
+        Comment.objects.create(post=self.hot, author=self.author, text='!')
+        counters = dict(
+            EngagementCounter.objects.values_list('kind', 'count')
+        )
+        self.assertEqual(counters, {'post': 1, 'group': 3 + 1})
+
+    def test_decay_and_ranking(self):
+        """Свежая активность весит больше старой."""
+        now = time.time()
+        bump(EngagementCounter.POST, self.quiet.pk, 3, now=now - 3 * 3600)
+        bump(EngagementCounter.POST, self.hot.pk, 1, now=now)
+        top = compute_trending(now=now)
+        self.assertEqual(
+            [post_id for post_id, _ in top['post']],
+            [self.hot.pk, self.quiet.pk]
+        )
+
+    def test_prune_old_counters(self):
+        """Задача удаляет счетчики старше окна."""
+        old = time.time() - 25 * 3600
+        bump(EngagementCounter.POST, self.quiet.pk, now=old)
+        call_command('update_trending', stdout=StringIO())
+        self.assertFalse(
+            EngagementCounter.objects.filter(hour=current_hour(old)).exists()
+        )
+
+    def test_top_stored_in_table(self):
+        """Задача записывает top-K в таблицу, а не только в свой кэш."""
+        Comment.objects.create(post=self.hot, author=self.author, text='!')
+        call_command('update_trending', stdout=StringIO())
+        cache.clear()
+        self.assertEqual(
+            list(TrendingItem.objects.values_list('kind', 'object_id')),
+            [('group', self.group.pk), ('post', self.hot.pk)]
+        )
+        with self.assertNumQueries(1):
+            top = get_trending()
+        self.assertEqual(top['post'][0][0], self.hot.pk)
+
+    def test_no_aggregation_before_first_run(self):
+        """Пока задача не отработала, список пуст и счетчики не читаются."""
+        bump(EngagementCounter.POST, self.hot.pk)
+        with self.assertNumQueries(1):
+            top = get_trending()
+        self.assertEqual(top, {'post': [], 'group': []})
+
+    def test_trending_page(self):
+        """Страница показывает готовый список без агрегации."""
+        Comment.objects.create(post=self.hot, author=self.author, text='!')
+        compute_trending()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.hot])
+        self.assertEqual(response.context['groups'], [self.group])
+        with self.assertNumQueries(0):
+            get_trending()
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, UniqueViewSketch
+from posts.unique_viewers import buffer, unique_viewers
+
+User = get_user_model()
+
+
+@override_settings(
+    VIEW_COUNTS_ENABLED=False,
+    UNIQUE_VIEWERS_FLUSH_INTERVAL=60 * 60,
+    UNIQUE_VIEWERS_MAX_PENDING=10 ** 6,
+)
+class UniqueViewersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        buffer.clear()
+        buffer.pruned = None
+
+    def visit(self, url, user=None, times=1):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        for _ in range(times):
+            client.get(url)
+
+    def test_unique_post_readers(self):
+        """Повторные просмотры одного читателя не увеличивают оценку."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        for reader in self.readers:
+            self.visit(url, reader, times=3)
+        self.visit(url)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(
+            unique_viewers(UniqueViewSketch.POST, self.post.pk), 4
+        )
+
+    def test_flushes_merge(self):
+        """Скетчи разных сбросов объединяются в одну дневную запись."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.visit(url, self.readers[0])
+        buffer.flush()
+        self.visit(url, self.readers[0])
+        self.visit(url, self.readers[1])
+        buffer.flush()
+        self.assertEqual(UniqueViewSketch.objects.count(), 1)
+        self.assertEqual(
+            unique_viewers(UniqueViewSketch.PROFILE, self.author.pk), 2
+        )
+
+    def test_shown_only_to_author(self):
+        """Оценку видит только автор."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.visit(url, self.readers[0])
+        buffer.flush()
+        client = Client()
+        client.force_login(self.readers[0])
+        self.assertNotContains(client.get(url), 'Уникальных читателей')
+        client.force_login(self.author)
+        self.assertContains(
+            client.get(url), 'Уникальных читателей за 30 дн.: 1'
+        )
+
+    @override_settings(UNIQUE_VIEWERS_FLUSH_INTERVAL=0)
+    def test_flushed_by_background_thread(self):
+        """Запрос только копит скетч, записывает его поток записи."""
+        self.visit(reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertFalse(UniqueViewSketch.objects.exists())
+        buffer.flush_if_due()
+        self.assertEqual(
+            unique_viewers(UniqueViewSketch.POST, self.post.pk), 1
+        )
+
+    def test_old_sketches_pruned(self):
+        """Скетчи за пределами периода удаляются раз в день."""
+        today = timezone.localdate()
+        for days in (30, 29):
+            UniqueViewSketch.objects.create(
+                kind=UniqueViewSketch.POST, object_id=self.post.pk,
+                day=today - timedelta(days), registers=b'',
+            )
+        buffer.flush_if_due()
+        self.assertEqual(
+            list(UniqueViewSketch.objects.values_list('day', flat=True)),
+            [today - timedelta(29)]
+        )
+        with self.assertNumQueries(0):
+            buffer.flush_if_due()
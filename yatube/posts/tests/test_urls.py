@@ -2,7 +2,7 @@ from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.models import Follow, Group, Post
@@ -193,6 +193,7 @@ class PostURLTests(TestCase):
                 kwargs={'post_id': PostURLTests.post.pk}
             ))
 
+    @override_settings(STREAMING_RENDER_ENABLED=False)
     def test_urls_uses_correct_template(self):
         """URL-адреса используют правильные шаблоны."""
         for address, status in self.urls_resp_status.items():
@@ -0,0 +1,139 @@
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import unique_viewers
+from posts.models import Post, UniqueViewSketch
+from posts.view_counts import ViewBuffer, buffer
+
+User = get_user_model()
+
+
+@override_settings(
+    UNIQUE_VIEWERS_ENABLED=False,
+    VIEW_COUNTS_FLUSH_INTERVAL=60 * 60,
+    VIEW_COUNTS_MAX_PENDING=10 ** 6,
+)
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author)
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        buffer.clear()
+        buffer.wakeup.clear()
+        unique_viewers.buffer.clear()
+
+    def views(self):
+        return list(
+            Post.objects.order_by('pk').values_list('views', flat=True)
+        )
+
+    def open_post(self, post, times=1):
+        for _ in range(times):
+            self.client.get(
+                reverse('posts:post_detail', args=(post.pk,))
+            )
+
+    def test_views_buffered_until_flush(self):
+        """Просмотры не пишутся в базу на каждый запрос."""
+        self.open_post(self.posts[0], 3)
+        self.open_post(self.posts[2])
+        self.assertEqual(self.views(), [0, 0, 0])
+        with self.assertNumQueries(1):
+            buffer.flush()
+        self.assertEqual(self.views(), [3, 0, 1])
+
+    def test_cached_pages_counted(self):
+        """Страницы из кэша анонимного быстрого пути тоже считаются."""
+        self.open_post(self.posts[1], 2)
+        buffer.flush()
+        self.assertEqual(self.views(), [0, 2, 0])
+
+    def test_full_buffer_wakes_flush_thread(self):
+        """Набранный лимит будит поток записи, а запрос базу не трогает."""
+        with self.settings(VIEW_COUNTS_MAX_PENDING=2):
+            self.open_post(self.posts[0])
+            self.assertFalse(buffer.wakeup.is_set())
+            self.open_post(self.posts[0])
+        self.assertTrue(buffer.wakeup.is_set())
+        self.assertEqual(self.views(), [0, 0, 0])
+
+    def test_flush_thread(self):
+        """Поток записи просыпается, когда буфер заполнен."""
+        view_buffer = ViewBuffer()
+        flushed = threading.Event()
+
+        def flush():
+            view_buffer.clear()
+            flushed.set()
+
+        with mock.patch.object(view_buffer, 'flush', side_effect=flush):
+            with self.settings(VIEW_COUNTS_MAX_PENDING=1):
+                view_buffer.start()
+                view_buffer.add(self.posts[0].pk)
+                self.assertTrue(flushed.wait(5))
+                view_buffer.stop()
+        self.assertFalse(view_buffer.thread.is_alive())
+
+    def test_edit_keeps_flushed_views(self):
+        """Правка поста не записывает views, прочитанные в начале
+        запроса, поверх просмотров из буфера.
+        """
+        post = self.posts[0]
+        self.client.force_login(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse('posts:post_edit', args=(post.pk,)),
+                {'text': 'Исправленный текст'},
+            )
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"views"', updates[0])
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text, 'Исправленный текст'
+        )
+
+    def test_flush_command(self):
+        """Команда записывает оба буфера процесса."""
+        with self.settings(UNIQUE_VIEWERS_ENABLED=True,
+                           UNIQUE_VIEWERS_FLUSH_INTERVAL=60 * 60):
+            self.open_post(self.posts[0], 2)
+        out = StringIO()
+        call_command('flush_views', stdout=out)
+        self.assertEqual(
+            out.getvalue().strip(),
+            'Записано просмотров: 2, скетчей читателей: 1'
+        )
+        self.assertEqual(self.views(), [2, 0, 0])
+        self.assertEqual(
+            unique_viewers.unique_viewers(
+                UniqueViewSketch.POST, self.posts[0].pk
+            ),
+            1
+        )
+
+    def test_failed_flush_keeps_views(self):
+        """Если база занята, просмотры остаются в буфере."""
+        self.open_post(self.posts[0])
+        target = 'posts.view_counts.apply_counts'
+        with mock.patch(target, side_effect=OperationalError('locked')):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.views(), [1, 0, 0])
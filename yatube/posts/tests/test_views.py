@@ -102,6 +102,7 @@ class PostPagesTests(TestCase):
         self.authorized_author = Client()
         self.authorized_author.force_login(self.author)
 
+    @override_settings(STREAMING_RENDER_ENABLED=False)
     def test_pages_uses_correct_template(self):
         """Во view-функциях используются правильные шаблоны."""
         urls_templates = {
@@ -189,6 +190,7 @@ class PostPagesTests(TestCase):
                 for post in response.context['page_obj']:
                     self.assertIn(post, page_context)
 
+    @override_settings(STREAMING_RENDER_ENABLED=False)
     def test_post_detail_show_correct_context(self):
         """Шаблон post_detail сформирован с правильным контекстом."""
         address = reverse(
@@ -233,6 +235,7 @@ class PostPagesTests(TestCase):
                     self.assertNotIn(post, response.context.get('page_obj'))
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class FollowTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -256,6 +259,11 @@ class FollowTests(TestCase):
             author=cls.author
         )
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self):
         cache.clear()
         self.guest_client = Client()
@@ -350,6 +358,7 @@ class FollowTests(TestCase):
                     )
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class CacheTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -358,6 +367,11 @@ class CacheTests(TestCase):
         cls.user = User.objects.create_user(username='TestUser')
         cls.group = Group.objects.create(**GROUP_TEST_DATA_0)
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self):
         cache.clear()
         self.authorized_user = Client()
@@ -0,0 +1,99 @@
+"""Популярные посты и группы по активности за скользящее окно.
+
+Каждый комментарий и новый пост увеличивают почасовые счетчики
+``EngagementCounter``. Команда ``update_trending`` раз в несколько минут
+удаляет счетчики старше окна, суммирует остальные с экспоненциальным
+затуханием и записывает top-K в таблицу ``TrendingItem``. Воркеры
+читают ее одним запросом и держат копию в своем кэше
+``TRENDING_CACHE_TIMEOUT`` секунд: кэш по умолчанию локальный
+для процесса, и то, что команда положила бы в него, воркеры не увидят.
+"""
+import heapq
+import time
+from collections import Counter
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import EngagementCounter, TrendingItem
+
+CACHE_KEY = 'trending:top'
+
+
+def current_hour(now=None):
+    return int((time.time() if now is None else now) // 3600)
+
+
+def bump(kind, object_id, amount=1, now=None):
+    """Увеличивает счетчик текущего часа, создавая его при необходимости."""
+    lookup = {'kind': kind, 'object_id': object_id, 'hour': current_hour(now)}
+    counters = EngagementCounter.objects.filter(**lookup)
+    if counters.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            EngagementCounter.objects.create(count=amount, **lookup)
+    except IntegrityError:
+        counters.update(count=F('count') + amount)
+
+
+def compute_trending(now=None, prune=False):
+    """Считает top-K и сохраняет его в таблицу ``TrendingItem``.
+
+    Вклад часа уменьшается вдвое каждые ``TRENDING_HALF_LIFE`` часов.
+    С ``prune`` счетчики за пределами окна удаляются.
+    """
+    hour = current_hour(now)
+    start = hour - settings.TRENDING_WINDOW_HOURS + 1
+    if prune:
+        EngagementCounter.objects.filter(hour__lt=start).delete()
+    scores = {
+        EngagementCounter.POST: Counter(),
+        EngagementCounter.GROUP: Counter(),
+    }
+    counters = (
+        EngagementCounter.objects.filter(hour__gte=start)
+        .values_list('kind', 'object_id', 'hour', 'count')
+        .iterator()
+    )
+    for kind, object_id, counter_hour, count in counters:
+        age = hour - counter_hour
+        scores[kind][object_id] += (
+            count * 0.5 ** (age / settings.TRENDING_HALF_LIFE)
+        )
+    top = {
+        kind: heapq.nlargest(
+            settings.TRENDING_TOP_K, counter.items(), key=itemgetter(1)
+        )
+        for kind, counter in scores.items()
+    }
+    with transaction.atomic():
+        TrendingItem.objects.all().delete()
+        TrendingItem.objects.bulk_create(
+            TrendingItem(
+                kind=kind, object_id=object_id, score=score, rank=rank
+            )
+            for kind, items in top.items()
+            for rank, (object_id, score) in enumerate(items, 1)
+        )
+    cache.delete(CACHE_KEY)
+    return top
+
+
+def get_trending():
+    """Готовый top-K: из кэша процесса или одним запросом к таблице.
+
+    Счетчики здесь не агрегируются: пока задача не отработала, список
+    пуст.
+    """
+    top = cache.get(CACHE_KEY)
+    if top is None:
+        top = {EngagementCounter.POST: [], EngagementCounter.GROUP: []}
+        items = TrendingItem.objects.values_list('kind', 'object_id', 'score')
+        for kind, object_id, score in items:
+            top[kind].append((object_id, score))
+        cache.set(CACHE_KEY, top, settings.TRENDING_CACHE_TIMEOUT)
+    return top
@@ -0,0 +1,185 @@
+"""Уникальные читатели постов и профилей.
+
+Читатели каждого поста и профиля за день попадают в HyperLogLog-скетч
+(4 КиБ при любом числе читателей). Скетчи копятся в памяти воркера,
+и поток записи просмотров (``view_counts``) раз
+в ``UNIQUE_VIEWERS_FLUSH_INTERVAL`` секунд или при
+``UNIQUE_VIEWERS_MAX_PENDING`` скетчах объединяет их с сохраненными
+в ``UniqueViewSketch``; запрос базу не ждет. Оценка за период —
+объединение дневных скетчей; ошибка около 1.6 %. Скетчи старше
+``UNIQUE_VIEWERS_DAYS`` дней раз в день удаляются.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from core.hyperloglog import HyperLogLog
+
+from . import view_counts
+from .models import UniqueViewSketch
+
+PRECISION = 12
+
+User = get_user_model()
+
+
+def visitor_id(request):
+    """Пользователь по id, аноним — по адресу и браузеру."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return 'anonymous:{}|{}'.format(
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+
+def store(pending):
+    """Объединяет накопленные скетчи с сохраненными.
+
+    Профили в буфере записаны по username (его знает адрес страницы),
+    здесь они одним запросом переводятся в id.
+    """
+    usernames = {
+        key for kind, key, _ in pending if kind == UniqueViewSketch.PROFILE
+    }
+    user_ids = dict(
+        User.objects.filter(username__in=usernames)
+        .values_list('username', 'pk')
+    ) if usernames else {}
+    groups = defaultdict(dict)
+    for (kind, key, day), sketch in pending.items():
+        object_id = key
+        if kind == UniqueViewSketch.PROFILE:
+            object_id = user_ids.get(key)
+        if object_id is None:
+            continue
+        sketches = groups[kind, day]
+        if object_id in sketches:
+            sketches[object_id].merge(sketch)
+        else:
+            sketches[object_id] = sketch
+    with transaction.atomic():
+        for (kind, day), sketches in groups.items():
+            rows = UniqueViewSketch.objects.select_for_update().filter(
+                kind=kind, day=day, object_id__in=list(sketches)
+            )
+            for row in rows:
+                sketch = sketches.pop(row.object_id)
+                row.registers = sketch.merge(
+                    HyperLogLog.from_bytes(bytes(row.registers))
+                ).to_bytes()
+                row.save(update_fields=('registers',))
+            UniqueViewSketch.objects.bulk_create(
+                UniqueViewSketch(
+                    kind=kind, object_id=object_id, day=day,
+                    registers=sketch.to_bytes(),
+                )
+                for object_id, sketch in sketches.items()
+            )
+
+
+class SketchBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sketches = {}
+        self.flushed = time.monotonic()
+        self.pruned = None
+        self.database = None
+
+    def add(self, kind, key, visitor):
+        day = timezone.localdate()
+        self.database = connection.settings_dict['NAME']
+        with self.lock:
+            sketch = self.sketches.get((kind, key, day))
+            if sketch is None:
+                sketch = self.sketches[kind, key, day] = HyperLogLog(
+                    PRECISION
+                )
+            sketch.add(visitor)
+            full = len(self.sketches) >= settings.UNIQUE_VIEWERS_MAX_PENDING
+        view_counts.buffer.wake(full)
+
+    def flush_if_due(self):
+        """Вызывается потоком записи при каждом пробуждении."""
+        with self.lock:
+            due = (
+                len(self.sketches) >= settings.UNIQUE_VIEWERS_MAX_PENDING
+                or time.monotonic() - self.flushed
+                >= settings.UNIQUE_VIEWERS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+        if self.pruned != timezone.localdate():
+            self.prune()
+
+    def prune(self):
+        """Удаляет скетчи, которые не попадают ни в один показываемый
+        период.
+        """
+        today = timezone.localdate()
+        try:
+            UniqueViewSketch.objects.filter(
+                day__lte=today - timedelta(settings.UNIQUE_VIEWERS_DAYS)
+            ).delete()
+        except DatabaseError:
+            return
+        self.pruned = today
+
+    def flush(self):
+        with self.lock:
+            pending, self.sketches = self.sketches, {}
+            self.flushed = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            store(pending)
+        except DatabaseError:
+            with self.lock:
+                for key, sketch in pending.items():
+                    if key in self.sketches:
+                        sketch.merge(self.sketches[key])
+                    self.sketches[key] = sketch
+            return 0
+        return len(pending)
+
+    def clear(self):
+        with self.lock:
+            self.sketches.clear()
+
+
+buffer = SketchBuffer()
+view_counts.buffer.companions.append(buffer.flush_if_due)
+
+
+@atexit.register
+def flush_at_exit():
+    # Тестовый прогон подменяет базу: накопленное в тестах не должно
+    # попасть в рабочую базу при выходе.
+    if buffer.database != connection.settings_dict['NAME']:
+        return
+    try:
+        buffer.flush()
+    except Exception:
+        # База при остановке процесса уже может быть недоступна.
+        pass
+
+
+def unique_viewers(kind, object_id, days=None):
+    """Оценка числа уникальных читателей за последние ``days`` дней
+    или за все время.
+    """
+    rows = UniqueViewSketch.objects.filter(kind=kind, object_id=object_id)
+    if days is not None:
+        rows = rows.filter(day__gt=timezone.localdate() - timedelta(days))
+    sketch = HyperLogLog(PRECISION)
+    for registers in rows.values_list('registers', flat=True).iterator():
+        sketch.merge(HyperLogLog.from_bytes(bytes(registers)))
+    return sketch.count()
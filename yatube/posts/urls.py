@@ -1,13 +1,38 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('fragment/', views.index_fragment, name='index_fragment'),
+    path('rss/', feeds.latest_rss, name='feed'),
+    path('atom/', feeds.latest_atom, name='feed_atom'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path(
+        'group/<slug:slug>/fragment/',
+        views.group_posts_fragment,
+        name='group_posts_fragment'
+    ),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_feed'),
+    path(
+        'group/<slug:slug>/atom/', feeds.group_atom, name='group_feed_atom'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/fragment/',
+        views.profile_fragment,
+        name='profile_fragment'
+    ),
+    path(
+        'profile/<str:username>/rss/', feeds.author_rss, name='profile_feed'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_atom,
+        name='profile_feed_atom'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -16,7 +41,14 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comment/fragment/',
+        views.add_comment_fragment,
+        name='add_comment_fragment'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/fragment/', views.follow_fragment, name='follow_fragment'),
+    path('trending/', views.trending, name='trending'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -27,4 +59,14 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'profile/<str:username>/follow/json/',
+        views.profile_follow_json,
+        name='profile_follow_json'
+    ),
+    path(
+        'profile/<str:username>/unfollow/json/',
+        views.profile_unfollow_json,
+        name='profile_unfollow_json'
+    ),
 ]
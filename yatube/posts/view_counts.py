@@ -0,0 +1,152 @@
+"""Буфер просмотров постов.
+
+Просмотры копятся в памяти воркера, а фоновый поток воркера раз
+в ``VIEW_COUNTS_FLUSH_INTERVAL`` секунд (или раньше, при
+``VIEW_COUNTS_MAX_PENDING`` накопленных просмотрах) записывает их одним
+``UPDATE ... CASE`` на пачку постов. Запрос только увеличивает счетчик
+в памяти и не ждет базу. При падении воркера теряется не больше этого
+интервала или этого числа просмотров. Тот же поток записывает
+и буферы, подключенные через ``buffer.companions`` (скетчи уникальных
+читателей).
+
+Счетчик меняется только прибавлением через ``F('views')``. Код, который
+сохраняет загруженный ранее пост, передает ``update_fields`` без
+``views`` (так делают ``post_edit`` и админка): полное ``save()``
+вернуло бы прочитанное значение поверх просмотров, записанных буфером
+за это время.
+"""
+import atexit
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Post
+
+UPDATE_CHUNK = 500
+
+
+def apply_counts(counts):
+    """Прибавляет просмотры пачками по ``UPDATE_CHUNK`` постов."""
+    post_ids = sorted(counts)
+    for start in range(0, len(post_ids), UPDATE_CHUNK):
+        chunk = post_ids[start:start + UPDATE_CHUNK]
+        Post.objects.filter(pk__in=chunk).update(views=F('views') + Case(
+            *(When(pk=pk, then=Value(counts[pk])) for pk in chunk),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+
+
+class ViewBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.pending = 0
+        self.database = None
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.pid = None
+        # Функции записи других буферов, которые вызывает тот же поток.
+        self.companions = []
+
+    def add(self, post_id):
+        self.database = connection.settings_dict['NAME']
+        with self.lock:
+            self.counts[post_id] += 1
+            self.pending += 1
+            full = self.pending >= settings.VIEW_COUNTS_MAX_PENDING
+        self.wake(full)
+
+    def wake(self, now=False):
+        """Перезапускает поток после fork и будит его, если ``now``."""
+        if self.pid is not None:
+            # Поток запускает веб-сервер; после fork он остается
+            # в родителе, и воркер запускает свой.
+            self.start()
+        if now:
+            self.wakeup.set()
+
+    def start(self):
+        """Запускает поток записи, если он еще не работает в этом
+        процессе.
+        """
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.stop_event.clear()
+            self.thread = threading.Thread(
+                target=self.flush_loop, name='view-counts-flush',
+                daemon=True,
+            )
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.wakeup.set()
+        self.thread.join()
+
+    def flush_loop(self):
+        while not self.stop_event.is_set():
+            self.wakeup.wait(settings.VIEW_COUNTS_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            try:
+                self.flush()
+                for flush in self.companions:
+                    flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.pending = 0
+        if not counts:
+            return 0
+        try:
+            apply_counts(counts)
+        except DatabaseError:
+            # База занята: просмотры вернутся в буфер до следующей попытки.
+            with self.lock:
+                self.counts.update(counts)
+                self.pending += sum(counts.values())
+            return 0
+        return sum(counts.values())
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+            self.pending = 0
+
+
+buffer = ViewBuffer()
+
+
+def start_from_settings():
+    """Запускает поток записи просмотров и уникальных читателей
+    в процессе веб-сервера.
+    """
+    if settings.VIEW_COUNTS_ENABLED or settings.UNIQUE_VIEWERS_ENABLED:
+        buffer.start()
+
+
+@atexit.register
+def flush_at_exit():
+    # Тестовый прогон подменяет базу: накопленное в тестах не должно
+    # попасть в рабочую базу при выходе.
+    if buffer.database != connection.settings_dict['NAME']:
+        return
+    try:
+        buffer.flush()
+    except Exception:
+        # База при остановке процесса уже может быть недоступна.
+        pass
@@ -1,15 +1,56 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 
+from core.cache import cache_page_swr
+from core.http import login_required_json
+from core.streaming import render_streaming
+
+from . import follow_graph, negative_cache
+from .cursors import encode_cursor, page_after
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Follow, Group, Post, UniqueViewSketch, User
+from .suggestions import suggestions_for
+from .trending import get_trending
+from .unique_viewers import unique_viewers
 
 POSTS_ON_PAGE = 10
 
 
-@cache_page(20, key_prefix='index_page')
+def fragment_url(view_name, cursor, *args):
+    return '{}?after={}'.format(reverse(view_name, args=args), cursor)
+
+
+def next_fragment(page_obj, view_name, *args):
+    """Адрес порции ленты, которая идет после страницы паджинатора."""
+    if not page_obj.has_next():
+        return None
+    return fragment_url(view_name, encode_cursor(page_obj[-1]), *args)
+
+
+def feed_fragment(request, posts, view_name, *args, **extra_context):
+    """Отдает порцию ленты после курсора из параметра ``after``."""
+    try:
+        page, cursor = page_after(
+            posts.select_related('author', 'group'),
+            request.GET.get('after'),
+            POSTS_ON_PAGE,
+        )
+    except ValueError:
+        return HttpResponseBadRequest()
+    context = {
+        'posts': page,
+        'next_fragment': cursor and fragment_url(view_name, cursor, *args),
+        **extra_context,
+    }
+    return render(request, 'posts/feed_fragment.html', context)
+
+
+@cache_page_swr(20, key_prefix='index_page')
 def index(request):
     template = 'posts/index.html'
     posts = Post.objects.all()
@@ -18,12 +59,22 @@ def index(request):
     page_obj = paginator.get_page(page_number)
     context = {
         'page_obj': page_obj,
+        'next_fragment': next_fragment(page_obj, 'posts:index_fragment'),
     }
     return render(request, template, context)
 
 
+@cache_page_swr(
+    settings.FEED_FRAGMENT_CACHE_TIMEOUT, key_prefix='index_fragment',
+    vary_on_user=False
+)
+def index_fragment(request):
+    return feed_fragment(request, Post.objects.all(), 'posts:index_fragment')
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
+    negative_cache.check(negative_cache.GROUPS, slug)
     group = get_object_or_404(Group, slug=slug)
     posts = group.group_posts.all()
     paginator = Paginator(posts, POSTS_ON_PAGE)
@@ -32,40 +83,99 @@ def group_posts(request, slug):
     context = {
         'group': group,
         'page_obj': page_obj,
+        'next_fragment': next_fragment(
+            page_obj, 'posts:group_posts_fragment', slug
+        ),
     }
     return render(request, template, context)
 
 
+@cache_page_swr(
+    settings.FEED_FRAGMENT_CACHE_TIMEOUT, key_prefix='group_fragment',
+    vary_on_user=False
+)
+def group_posts_fragment(request, slug):
+    negative_cache.check(negative_cache.GROUPS, slug)
+    group = get_object_or_404(Group, slug=slug)
+    return feed_fragment(
+        request, group.group_posts.all(), 'posts:group_posts_fragment', slug
+    )
+
+
 def profile(request, username):
     template = 'posts/profile.html'
+    negative_cache.check(negative_cache.USERS, username)
     author = get_object_or_404(User, username=username)
     posts = author.posts.all()
-    following = (request.user.is_authenticated and Follow.objects.filter(
-        author=author,
-        user=request.user
-    ).exists())
+    following = follow_graph.is_following(request.user, author)
     paginator = Paginator(posts, POSTS_ON_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
         'author': author,
         'page_obj': page_obj,
+        'next_fragment': next_fragment(
+            page_obj, 'posts:profile_fragment', username
+        ),
         'following': following,
+        'suggestions': suggestions_for(request.user),
+    }
+    if author == request.user:
+        context['unique_viewers'] = unique_viewers(
+            UniqueViewSketch.PROFILE, author.pk,
+            settings.UNIQUE_VIEWERS_DAYS
+        )
+        context['unique_viewers_days'] = settings.UNIQUE_VIEWERS_DAYS
+    return render(request, template, context)
+
+
+@cache_page_swr(
+    settings.FEED_FRAGMENT_CACHE_TIMEOUT, key_prefix='profile_fragment',
+    vary_on_user=False
+)
+def profile_fragment(request, username):
+    negative_cache.check(negative_cache.USERS, username)
+    author = get_object_or_404(User, username=username)
+    return feed_fragment(
+        request, author.posts.all(), 'posts:profile_fragment', username,
+        hide_author=True
+    )
+
+
+def trending(request):
+    template = 'posts/trending.html'
+    top = get_trending()
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [post_id for post_id, _ in top['post']]
+    )
+    groups = Group.objects.in_bulk(
+        [group_id for group_id, _ in top['group']]
+    )
+    context = {
+        'trending': True,
+        'posts': [posts[pk] for pk, _ in top['post'] if pk in posts],
+        'groups': [groups[pk] for pk, _ in top['group'] if pk in groups],
     }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
+    negative_cache.check(negative_cache.POSTS, post_id)
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
         'form': form,
         'comments': comments,
     }
-    return render(request, template, context)
+    if post.author == request.user:
+        context['unique_viewers'] = unique_viewers(
+            UniqueViewSketch.POST, post.pk, settings.UNIQUE_VIEWERS_DAYS
+        )
+        context['unique_viewers_days'] = settings.UNIQUE_VIEWERS_DAYS
+    return render_streaming(request, template, context)
 
 
 @login_required
@@ -100,7 +210,8 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        # Только поля формы: views меняет буфер просмотров.
+        form.save(commit=False).save(update_fields=PostForm.Meta.fields)
         return redirect('posts:post_detail', post_id)
 
     context = {
@@ -123,6 +234,23 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@require_POST
+@login_required_json
+def add_comment_fragment(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    comment.save()
+    return render(
+        request, 'posts/includes/comment.html', {'comment': comment},
+        status=201
+    )
+
+
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
@@ -132,10 +260,24 @@ def follow_index(request):
     page_obj = paginator.get_page(page_number)
     context = {
         'page_obj': page_obj,
+        'next_fragment': next_fragment(page_obj, 'posts:follow_fragment'),
+        'suggestions': suggestions_for(request.user),
     }
     return render(request, template, context)
 
 
+@login_required
+@cache_page_swr(
+    settings.FEED_FRAGMENT_CACHE_TIMEOUT, key_prefix='follow_fragment'
+)
+def follow_fragment(request):
+    return feed_fragment(
+        request,
+        Post.objects.filter(author__following__user=request.user),
+        'posts:follow_fragment'
+    )
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -155,3 +297,34 @@ def profile_unfollow(request, username):
         user=request.user
     ).delete()
     return redirect('posts:profile', username=username)
+
+
+def follow_state(user, author):
+    return JsonResponse({
+        'following': follow_graph.is_following(user, author),
+        'followers': author.following.count(),
+        'follows': len(follow_graph.following_ids(user.pk)),
+    })
+
+
+@require_POST
+@login_required_json
+def profile_follow_json(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(
+            author=author,
+            user=request.user
+        )
+    return follow_state(request.user, author)
+
+
+@require_POST
+@login_required_json
+def profile_unfollow_json(request, username):
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(
+        author=author,
+        user=request.user
+    ).delete()
+    return follow_state(request.user, author)
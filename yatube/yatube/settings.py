@@ -28,13 +28,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.compression.CompressionMiddleware',
+    'posts.middleware.ViewTrackingMiddleware',
+    'core.middleware.anonymous.AnonymousFastPathMiddleware',
+    'core.middleware.ratelimit.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.replica.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -63,9 +70,38 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+if os.environ.get('SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+REPLICA_READ_VIEWS = (
+    'posts:index',
+    'posts:group_posts',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+)
+REPLICA_PIN_SECONDS = 10
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16 * 1024,
+    'busy_timeout': 5000,
+}
+DB_HEALTH_CHECK_INTERVAL = 30
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME':
@@ -101,12 +137,23 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_PUBLIC_PREFIXES = ('posts/', 'cache/')
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.OutboxEmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_LEASE = 5 * 60
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
@@ -115,3 +162,93 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
+SAMPLING_PROFILER_ENABLED = bool(os.environ.get('SAMPLING_PROFILER'))
+SAMPLING_PROFILER_DIR = os.path.join(BASE_DIR, 'profiles', 'samples')
+SAMPLING_PROFILER_INTERVAL = 0.01
+SAMPLING_PROFILER_FLUSH_INTERVAL = 60
+SAMPLING_PROFILER_MAX_FILES = 100
+
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 1
+
+ANONYMOUS_FAST_PATH_VIEWS = (
+    'posts:index',
+    'posts:trending',
+    'posts:group_posts',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:index_fragment',
+    'posts:group_posts_fragment',
+    'posts:profile_fragment',
+)
+ANONYMOUS_FAST_PATH_TIMEOUT = 60
+
+FEED_FRAGMENT_CACHE_TIMEOUT = 60
+
+STREAMING_RENDER_ENABLED = True
+STREAMING_CHUNK_SIZE = 4096
+
+STATIC_SNAPSHOT_ROOT = os.environ.get('STATIC_SNAPSHOT_ROOT')
+
+NEGATIVE_CACHE_ENABLED = bool(os.environ.get('NEGATIVE_CACHE'))
+NEGATIVE_CACHE_ERROR_RATE = 0.01
+NEGATIVE_CACHE_HEADROOM = 2
+NEGATIVE_CACHE_TIMEOUT = 2 * 60 * 60
+NEGATIVE_CACHE_REBUILD_LOCK = 5 * 60
+
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+
+RATELIMIT_ENABLED = True
+RATELIMIT_IP_META = 'REMOTE_ADDR'
+RATELIMIT_IP_FACTOR = 10
+RATELIMITS = {
+    'posts:post_create': {'rate': '10/m', 'methods': ('POST',)},
+    'posts:add_comment': {'rate': '20/m', 'methods': ('POST',)},
+    'posts:add_comment_fragment': {
+        'rate': '20/m', 'methods': ('POST',), 'scope': 'posts:add_comment',
+    },
+    'posts:profile_follow': {'rate': '60/m'},
+    'posts:profile_follow_json': {
+        'rate': '60/m', 'scope': 'posts:profile_follow',
+    },
+    'users:signup': {
+        'rate': '5/h', 'ip_rate': '20/h', 'methods': ('POST',),
+    },
+}
+
+FOLLOW_GRAPH_TIMEOUT = 24 * 60 * 60
+FOLLOW_SUGGESTIONS_STORED = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+
+VIEW_COUNTS_ENABLED = True
+VIEW_COUNTS_FLUSH_INTERVAL = 5
+VIEW_COUNTS_MAX_PENDING = 1000
+UNIQUE_VIEWERS_ENABLED = True
+UNIQUE_VIEWERS_FLUSH_INTERVAL = 30
+UNIQUE_VIEWERS_MAX_PENDING = 500
+UNIQUE_VIEWERS_DAYS = 30
+
+TRENDING_WINDOW_HOURS = 48
+TRENDING_HALF_LIFE = 6
+TRENDING_TOP_K = 20
+TRENDING_CACHE_TIMEOUT = 60
+TRENDING_WEIGHTS = {'comment': 1, 'post': 3}
+
+CACHE_STALE_GRACE = 30
+CACHE_EARLY_REFRESH_BETA = 1.0
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_WAIT = 0.5
+CACHE_LOCK_POLL = 0.02
+# Срок записей, которые сбрасывают сигналы, если кэш не общий
+# для процессов (LocMemCache): сброс в одном воркере не виден другим.
+LOCAL_CACHE_TIMEOUT = 30
+
+COMPRESSION_MIN_SIZE = 200
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BR_QUALITY = 5
+COMPRESSION_CACHE_TIMEOUT = 5 * 60
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from core.sampling import start_from_settings  # noqa: E402
+from posts import view_counts  # noqa: E402
+
+start_from_settings()
+view_counts.start_from_settings()